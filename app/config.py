@@ -1,8 +1,9 @@
 # app/config.py
 import os
-import json
 from typing import Dict
 
+from app.utils import google_auth
+
 class Config:
     def __init__(self):
         self._creds = self._load_google_creds()
@@ -56,14 +57,8 @@ class Config:
         return os.getenv("SUPABASE_SERVICE_KEY", "")
 
     def _load_google_creds(self) -> Dict:
-        creds_json_str = os.getenv("GOOGLE_CREDS_JSON")
-        if not creds_json_str:
-            raise RuntimeError("GOOGLE_CREDS_JSON not set in environment")
-
-        creds_json = json.loads(creds_json_str)
-        if "private_key" in creds_json:
-            creds_json["private_key"] = creds_json["private_key"].replace("\\n", "\n")
-        return creds_json
+        # Di-parse sekali di google_auth, dipakai bersama Sheets & Drive
+        return google_auth.service_account_info()
 
 def load_config() -> Config:
     return Config()
@@ -34,7 +34,7 @@ Base = declarative_base()
 # Database initialization function
 def init_db():
     try:
-        from app.utils.models import User  # Import all models here
+        from app.utils.models import User, AssetRecord, DataSnapshot, PhotoJob, PhotoJobChunk, AssetTagSequence  # Import all models here
         Base.metadata.create_all(bind=engine)
         logging.info("Database tables created successfully")
     except Exception as e:
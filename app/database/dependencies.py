@@ -8,6 +8,7 @@ import logging
 
 from app.utils.auth import verify_token
 from app.database.database import SessionLocal
+from app.utils.asset_snapshot import AssetSnapshot
 
 # Setup logger (opsional)
 logger = logging.getLogger(__name__)
@@ -25,6 +26,12 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+def get_asset_snapshot() -> AssetSnapshot:
+    """
+    Dependency snapshot data aset: register Assets hanya diambil sekali per request.
+    """
+    return AssetSnapshot()
+
 def get_current_user(
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
@@ -11,6 +11,7 @@ from app.routes import (
     sync,
     relocation,
     disposal,
+    admin,
 )
 
 def create_app() -> FastAPI:
@@ -29,5 +30,6 @@ def create_app() -> FastAPI:
     app.include_router(sync.router)
     app.include_router(relocation.router)
     app.include_router(disposal.router)
+    app.include_router(admin.router)
 
     return app
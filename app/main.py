@@ -9,6 +9,7 @@ from starlette.middleware.sessions import SessionMiddleware
 from app.init import create_app
 from app.config import load_config
 from app.database.database import init_db
+from app.utils import audit_log, google_async, google_auth, photo_jobs, sheets, sheet_version
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -28,6 +29,51 @@ except Exception as e:
 # Inisialisasi aplikasi FastAPI
 app = create_app()
 
+# Token Google di-refresh di background sebelum kedaluwarsa
+@app.on_event("startup")
+def start_token_refresher():
+    google_auth.start()
+
+@app.on_event("shutdown")
+def stop_token_refresher():
+    google_auth.stop()
+
+# Worker background untuk Log_Status / Log_Relocation / Log_Disposal
+@app.on_event("startup")
+def start_audit_log():
+    audit_log.start()
+
+# Worker job foto (resize + upload Drive); job yang tertunda dilanjutkan
+@app.on_event("startup")
+def start_photo_jobs():
+    photo_jobs.start()
+
+@app.on_event("shutdown")
+def stop_photo_jobs():
+    photo_jobs.shutdown()
+
+# Snapshot data (PostgreSQL): halaman pertama setelah cold start tidak menunggu Sheets
+@app.on_event("startup")
+def warm_up_data():
+    sheets.warm_up()
+
+# Probe versi spreadsheet: cache data sheet berlaku sampai sheet berubah
+@app.on_event("startup")
+def start_sheet_version_probe():
+    sheet_version.start()
+
+@app.on_event("shutdown")
+def stop_sheet_version_probe():
+    sheet_version.stop()
+
+@app.on_event("shutdown")
+def flush_audit_log():
+    audit_log.shutdown()
+
+@app.on_event("shutdown")
+async def close_google_client():
+    await google_async.aclose()
+
 # Tambahkan session middleware
 app.add_middleware(SessionMiddleware, secret_key=config.SESSION_SECRET)
 
@@ -0,0 +1,48 @@
+# app/routes/admin.py
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+
+from app.database.dependencies import get_admin_user
+from app.utils import quota, data_snapshot, sheet_version, http_pool, photo_jobs, photo_cache, asset_import
+from app.utils.cache import get_cache_stats
+
+router = APIRouter()
+
+@router.get("/admin/quota")
+def quota_status(user=Depends(get_admin_user)):
+    """Current Google Sheets read/write budget usage"""
+    return quota.get_stats()
+
+@router.get("/admin/cache")
+def cache_status(user=Depends(get_admin_user)):
+    """In-process cache hit/miss/eviction counters"""
+    return get_cache_stats()
+
+@router.get("/admin/snapshot")
+def snapshot_status(user=Depends(get_admin_user)):
+    """Datasets in the saved snapshot and whether they are being served from it"""
+    return data_snapshot.get_stats()
+
+@router.get("/admin/sheet-version")
+def sheet_version_status(user=Depends(get_admin_user)):
+    """Spreadsheet version seen by the change probe"""
+    return sheet_version.get_stats()
+
+@router.get("/admin/metrics")
+def metrics(user=Depends(get_admin_user)):
+    """All runtime counters in one response (HTTP connection reuse, quota, cache, sheet version)"""
+    return {
+        "http": http_pool.get_stats(),
+        "quota": quota.get_stats(),
+        "cache": get_cache_stats(),
+        "sheet_version": sheet_version.get_stats(),
+        "photo_jobs": photo_jobs.get_stats(),
+        "photo_cache": photo_cache.get_stats(),
+    }
+
+@router.post("/admin/import")
+def import_assets(file: UploadFile = File(...), dry_run: bool = Form(False), user=Depends(get_admin_user)):
+    """Bulk import assets from a CSV/XLSX file; returns a per-row error report"""
+    try:
+        return asset_import.import_assets(file.filename, file.file, dry_run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
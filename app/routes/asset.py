@@ -2,10 +2,12 @@
 from fastapi import APIRouter, Request, Form, Depends
 from fastapi.responses import RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 from io import StringIO
 import csv
-from app.utils import sheets
-from app.database.dependencies import get_current_user
+from app.utils import sheets, data_snapshot
+from app.database.dependencies import get_current_user, get_asset_snapshot
+from app.utils.asset_snapshot import AssetSnapshot
 from app.utils.references import validate_category_or_default
 from app.utils.flash import flash
 
@@ -74,12 +76,13 @@ def submit_asset(
     # Extract company name if in "Company (CODE)" format
     company_name = company.split(" (")[0] if " (" in company else company
 
-    # Add references if they don't exist
-    add_type_if_not_exists(type, category)
-    add_location_if_not_exists(location, room_location)
-    add_company_with_code_if_not_exists(company_name, code_company)
-    add_owner_if_not_exists(owner, "")
-    add_category_if_not_exists(category, "")
+    # Add references if they don't exist (appends flushed together)
+    with sheets.write_batch():
+        add_type_if_not_exists(type, category)
+        add_location_if_not_exists(location, room_location)
+        add_company_with_code_if_not_exists(company_name, code_company)
+        add_owner_if_not_exists(owner, "")
+        add_category_if_not_exists(category, "")
 
     data = {
         "item_name": item_name, "category": category, "type": type,
@@ -99,9 +102,15 @@ def submit_asset(
     return RedirectResponse(url="/input", status_code=303)
 
 @router.get("/dashboard")
-def dashboard(request: Request, status: str = "All", user=Depends(get_current_user)):
-    data = sheets.get_assets(status)
-    all_data = sheets.get_assets("All")  # For statistics
+async def dashboard(request: Request, status: str = "All", user=Depends(get_current_user),
+                    snapshot: AssetSnapshot = Depends(get_asset_snapshot)):
+    await snapshot.load_async()
+    # Ringkasan & render di threadpool: register besar tidak menahan event loop
+    return await run_in_threadpool(_render_dashboard, request, snapshot, status, user)
+
+def _render_dashboard(request: Request, snapshot: AssetSnapshot, status: str, user):
+    data = snapshot.by_status(status)
+    all_data = snapshot.assets  # For statistics
     
     kategori_summary, tahun_summary = {}, {}
     active_count = repair_count = disposed_count = 0
@@ -133,6 +142,7 @@ def dashboard(request: Request, status: str = "All", user=Depends(get_current_us
 
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
+        "data_as_of": data_snapshot.data_as_of(),
         "selected_status": status,
         "assets": data,
         "kategori_labels": list(kategori_summary.keys()),
@@ -146,8 +156,13 @@ def dashboard(request: Request, status: str = "All", user=Depends(get_current_us
     })
 
 @router.get("/export")
-def export_excel(status: str = "All", user=Depends(get_current_user)):
-    data = sheets.get_assets(status)
+async def export_excel(status: str = "All", user=Depends(get_current_user),
+                       snapshot: AssetSnapshot = Depends(get_asset_snapshot)):
+    await snapshot.load_async()
+    return await run_in_threadpool(_export_csv, snapshot, status)
+
+def _export_csv(snapshot: AssetSnapshot, status: str):
+    data = snapshot.by_status(status)
     if not data:
         output = StringIO()
         output.write("No data available")
@@ -1,97 +1,104 @@
 # app/routes/assets.py
-from fastapi import APIRouter, Request, Form, Depends, File, UploadFile
-from fastapi.responses import RedirectResponse
+import logging
+from fastapi import APIRouter, Request, Form, Depends, File, UploadFile, HTTPException
+from fastapi.responses import RedirectResponse, Response
 from fastapi.templating import Jinja2Templates
-from app.utils import sheets
-from app.database.dependencies import get_current_user
+from app.utils import sheets, audit_log, data_snapshot, photo_jobs, photo_cache
+from app.utils.image_render import RENDITIONS
+from app.utils.photo import drive_file_id
+from app.database.dependencies import get_current_user, get_asset_snapshot
+from app.utils.asset_snapshot import AssetSnapshot
 from app.utils.flash import flash, get_flashed_messages
-from app.utils.photo import resize_and_convert_image, upload_to_drive, delete_from_drive
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/assets")
-def list_assets(request: Request, status: str = "All", location: str = "All", room: str = "All", search: str = "", user=Depends(get_current_user)):
+async def list_assets(request: Request, status: str = "All", location: str = "All", room: str = "All", search: str = "", user=Depends(get_current_user),
+                      snapshot: AssetSnapshot = Depends(get_asset_snapshot)):
     try:
-        assets = sheets.get_assets(status)
-        
-        # Location filter
-        if location != "All":
-            assets = [asset for asset in assets if asset.get('Location', '').strip() == location]
-        
-        # Room filter
-        if room != "All":
-            assets = [asset for asset in assets if asset.get('Room Location', '').strip() == room]
-        
-        # Enhanced search filter - focus on key fields
-        if search:
-            search_term = search.lower().strip()
-            filtered_assets = []
-            
-            for asset in assets:
-                # Primary search fields (most important)
-                primary_fields = [
-                    str(asset.get('Item Name', '')),
-                    str(asset.get('Category', '')),
-                    str(asset.get('Type', '')),
-                    str(asset.get('Location', ''))
-                ]
-                
-                # Secondary search fields
-                secondary_fields = [
-                    str(asset.get('Asset Tag', '')),
-                    str(asset.get('ID', '')),
-                    str(asset.get('Manufacture', '')),
-                    str(asset.get('Model', '')),
-                    str(asset.get('Company', '')),
-                    str(asset.get('Room Location', ''))
-                ]
-                
-                # Check primary fields first (higher priority)
-                primary_match = any(search_term in field.lower() for field in primary_fields)
-                secondary_match = any(search_term in field.lower() for field in secondary_fields)
-                
-                if primary_match or secondary_match:
-                    filtered_assets.append(asset)
-            
-            assets = filtered_assets
-        
-        # Get unique locations and rooms for filter dropdowns
-        all_assets = sheets.get_assets("All")
-        locations = sorted(set(asset.get('Location', '').strip() for asset in all_assets if asset.get('Location', '').strip()))
-        
-        # Filter rooms based on selected location
-        if location != "All":
-            rooms = sorted(set(asset.get('Room Location', '').strip() for asset in all_assets 
-                             if asset.get('Location', '').strip() == location and asset.get('Room Location', '').strip()))
-        else:
-            rooms = []
-        
-        flash_messages = get_flashed_messages(request)
-        
-        return templates.TemplateResponse("assets_list.html", {
-            "request": request,
-            "assets": assets,
-            "selected_status": status,
-            "selected_location": location,
-            "selected_room": room,
-            "search_query": search,
-            "locations": locations,
-            "rooms": rooms,
-            "flash_messages": flash_messages,
-            "user": user
-        })
+        await snapshot.load_async()
+        # Filter & render di threadpool: daftar besar tidak menahan event loop
+        return await run_in_threadpool(_render_assets_list, request, snapshot, status, location, room, search, user)
         
     except Exception as e:
         flash(request, f"❌ Error loading assets: {str(e)}", "error")
         return RedirectResponse(url="/home", status_code=303)
 
+def _render_assets_list(request: Request, snapshot: AssetSnapshot, status: str, location: str, room: str,
+                        search: str, user):
+    assets = snapshot.by_status(status)
+    
+    # Location filter
+    if location != "All":
+        assets = [asset for asset in assets if asset.get('Location', '').strip() == location]
+    
+    # Room filter
+    if room != "All":
+        assets = [asset for asset in assets if asset.get('Room Location', '').strip() == room]
+    
+    # Enhanced search filter - focus on key fields
+    if search:
+        search_term = search.lower().strip()
+        filtered_assets = []
+        
+        for asset in assets:
+            # Primary search fields (most important)
+            primary_fields = [
+                str(asset.get('Item Name', '')),
+                str(asset.get('Category', '')),
+                str(asset.get('Type', '')),
+                str(asset.get('Location', ''))
+            ]
+            
+            # Secondary search fields
+            secondary_fields = [
+                str(asset.get('Asset Tag', '')),
+                str(asset.get('ID', '')),
+                str(asset.get('Manufacture', '')),
+                str(asset.get('Model', '')),
+                str(asset.get('Company', '')),
+                str(asset.get('Room Location', ''))
+            ]
+            
+            # Check primary fields first (higher priority)
+            primary_match = any(search_term in field.lower() for field in primary_fields)
+            secondary_match = any(search_term in field.lower() for field in secondary_fields)
+            
+            if primary_match or secondary_match:
+                filtered_assets.append(asset)
+        
+        assets = filtered_assets
+    
+    # Get unique locations and rooms for filter dropdowns (same snapshot, no second fetch)
+    locations = snapshot.locations()
+    
+    # Filter rooms based on selected location
+    rooms = snapshot.rooms(location) if location != "All" else []
+    
+    flash_messages = get_flashed_messages(request)
+    
+    return templates.TemplateResponse("assets_list.html", {
+        "request": request,
+        "data_as_of": data_snapshot.data_as_of(),
+        "assets": assets,
+        "selected_status": status,
+        "selected_location": location,
+        "selected_room": room,
+        "search_query": search,
+        "locations": locations,
+        "rooms": rooms,
+        "flash_messages": flash_messages,
+        "user": user
+    })
+
 @router.get("/assets/{asset_id}/detail")
-def asset_detail(request: Request, asset_id: str, user=Depends(get_current_user)):
+async def asset_detail(request: Request, asset_id: str, user=Depends(get_current_user),
+                       snapshot: AssetSnapshot = Depends(get_asset_snapshot)):
     try:
-        assets = sheets.get_assets("All")
-        asset = next((a for a in assets if str(a.get('ID', '')) == asset_id), None)
+        asset = await snapshot.find_async(asset_id)
         
         if not asset:
             flash(request, f"❌ Asset with ID {asset_id} not found", "error")
@@ -101,7 +108,9 @@ def asset_detail(request: Request, asset_id: str, user=Depends(get_current_user)
         
         return templates.TemplateResponse("asset_detail.html", {
             "request": request,
+            "data_as_of": data_snapshot.data_as_of(),
             "asset": asset,
+            "photo_jobs": await run_in_threadpool(photo_jobs.pending_for, asset_id),
             "flash_messages": flash_messages,
             "user": user
         })
@@ -111,7 +120,7 @@ def asset_detail(request: Request, asset_id: str, user=Depends(get_current_user)
         return RedirectResponse(url="/assets", status_code=303)
 
 @router.post("/assets/{asset_id}/photo")
-def upload_photo(
+async def upload_photo(
     request: Request,
     asset_id: str,
     photo: UploadFile = File(...),
@@ -123,45 +132,55 @@ def upload_photo(
             flash(request, "❌ Please upload an image file", "error")
             return RedirectResponse(url=f"/assets/{asset_id}/detail", status_code=303)
         
-        # Resize and convert to WebP
-        resized_image = resize_and_convert_image(photo.file)
-        if not resized_image:
-            flash(request, "❌ Error processing image", "error")
-            return RedirectResponse(url=f"/assets/{asset_id}/detail", status_code=303)
-        
-        # Upload to Google Drive
-        image_url = upload_to_drive(resized_image, photo.filename, asset_id)
-        if not image_url:
-            flash(request, "❌ Error uploading image", "error")
-            return RedirectResponse(url=f"/assets/{asset_id}/detail", status_code=303)
-        
-        # Update asset with photo URL
-        assets_ws = sheets.get_worksheet("Assets")
-        if assets_ws:
-            headers = assets_ws.row_values(1)
-            data = assets_ws.get_all_values()
-            
-            # Add Photo URL column if not exists
-            if "Photo URL" not in headers:
-                headers.append("Photo URL")
-                assets_ws.update('1:1', [headers])
-            
-            photo_col = headers.index("Photo URL") + 1
-            id_col = headers.index("ID") if "ID" in headers else 0
-            
-            # Find asset row and update photo URL
-            for i, row in enumerate(data[1:], start=2):
-                if len(row) > id_col and row[id_col] == asset_id:
-                    assets_ws.update_cell(i, photo_col, image_url)
-                    break
+        # Spool raw bytes; resize, Drive upload and Photo URL update run in the photo job queue
+        await run_in_threadpool(photo_jobs.submit, asset_id, photo.filename, photo.file)
         
-        flash(request, "✅ Photo uploaded successfully", "success")
+        flash(request, "📤 Photo received, processing in the background", "success")
         
     except Exception as e:
         flash(request, f"❌ Error uploading photo: {str(e)}", "error")
     
     return RedirectResponse(url=f"/assets/{asset_id}/detail", status_code=303)
 
+@router.get("/photos/{asset_id}/{size}")
+async def asset_photo(request: Request, asset_id: str, size: str, user=Depends(get_current_user),
+                      snapshot: AssetSnapshot = Depends(get_asset_snapshot)):
+    """Asset photo rendition served from the local disk cache (fetched from Drive once)"""
+    if size not in RENDITIONS:
+        raise HTTPException(status_code=404, detail="Unknown photo size")
+    asset = await snapshot.find_async(asset_id)
+    file_id = drive_file_id(asset.get("Photo URL")) if asset else None
+    if not file_id:
+        raise HTTPException(status_code=404, detail="Asset has no photo")
+
+    try:
+        cached = await run_in_threadpool(photo_cache.get, file_id, size)
+    except Exception as e:
+        logging.warning(f"Photo fetch failed for asset {asset_id}: {e}")
+        raise HTTPException(status_code=502, detail="Photo temporarily unavailable")
+    if not cached:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    content, etag = cached
+
+    # URL dengan ?v=<file_id> tidak pernah berubah isi; tanpa itu browser wajib revalidasi
+    versioned = request.query_params.get("v") == file_id
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, max-age=31536000, immutable" if versioned else "private, no-cache",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="image/webp", headers=headers)
+
+@router.get("/photo-jobs/{job_id}")
+def photo_job_status(job_id: str, user=Depends(get_current_user)):
+    """Status of a background photo job (polled by the asset detail page)"""
+    job = photo_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Photo job not found")
+    return {key: job[key] for key in ("id", "asset_id", "status", "attempts", "error", "image_url")}
+
 @router.post("/assets/{asset_id}/status")
 def change_status(
     request: Request, 
@@ -176,38 +195,32 @@ def change_status(
             flash(request, "❌ Cannot access assets data", "error")
             return RedirectResponse(url="/assets", status_code=303)
         
-        headers = assets_ws.row_values(1)
-        data = assets_ws.get_all_values()
-        
-        status_col = headers.index("Status") if "Status" in headers else None
-        id_col = headers.index("ID") if "ID" in headers else 0
-        item_name_col = headers.index("Item Name") if "Item Name" in headers else None
-        
-        if status_col is None:
+        if sheets.get_asset_column("Status") is None:
             flash(request, "❌ Cannot find status column", "error")
             return RedirectResponse(url="/assets", status_code=303)
         
         # Find asset row and get current data
-        for i, row in enumerate(data[1:], start=2):
-            if len(row) > id_col and row[id_col] == asset_id:
-                old_status = row[status_col] if len(row) > status_col else ""
-                asset_name = row[item_name_col] if item_name_col and len(row) > item_name_col else ""
-                
-                # Update status
-                assets_ws.update_cell(i, status_col + 1, new_status)
-                
-                # Log status change
-                log_status_change(
-                    asset_id=asset_id,
-                    asset_name=asset_name,
-                    old_status=old_status,
-                    new_status=new_status,
-                    changed_by=user.get("username", "Unknown"),
-                    notes=notes
-                )
-                
-                flash(request, f"✅ Asset {asset_id} status changed to {new_status}", "success")
-                return RedirectResponse(url="/assets", status_code=303)
+        found = sheets.read_asset_row(asset_id)
+        if found:
+            row_number, asset = found
+            old_status = asset.get("Status", "")
+            asset_name = asset.get("Item Name", "")
+            
+            # Update status
+            sheets.update_asset_fields(row_number, {"Status": new_status})
+            
+            # Log status change
+            log_status_change(
+                asset_id=asset_id,
+                asset_name=asset_name,
+                old_status=old_status,
+                new_status=new_status,
+                changed_by=user.get("username", "Unknown"),
+                notes=notes
+            )
+            
+            flash(request, f"✅ Asset {asset_id} status changed to {new_status}", "success")
+            return RedirectResponse(url="/assets", status_code=303)
         
         flash(request, f"❌ Asset {asset_id} not found", "error")
         
@@ -218,38 +231,26 @@ def change_status(
 
 def log_status_change(asset_id: str, asset_name: str, old_status: str, new_status: str, 
                      changed_by: str, notes: str = ""):
-    """Log status change to Google Sheets"""
-    try:
-        from datetime import datetime, timezone
-        
-        log_ws = sheets.get_worksheet("Log_Status")
-        if not log_ws:
-            # Create sheet if doesn't exist
-            sheet = sheets.get_sheet()
-            log_ws = sheet.add_worksheet(title="Log_Status", rows=1000, cols=8)
-            # Add headers
-            headers = [
-                "Timestamp", "Asset ID", "Asset Name", "Old Status", 
-                "New Status", "Changed By", "Notes", "Reason"
-            ]
-            log_ws.append_row(headers)
-        
-        # Add log entry
-        log_entry = [
-            datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-            asset_id,
-            asset_name,
-            old_status,
-            new_status,
-            changed_by,
-            notes,
-            f"Status changed from {old_status} to {new_status}"
-        ]
-        
-        log_ws.append_row(log_entry)
-        
-    except Exception as e:
-        print(f"Error logging status change: {e}")
+    """Queue a status change entry for Log_Status"""
+    from datetime import datetime, timezone
+    
+    headers = [
+        "Timestamp", "Asset ID", "Asset Name", "Old Status", 
+        "New Status", "Changed By", "Notes", "Reason"
+    ]
+    log_entry = [
+        datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        asset_id,
+        asset_name,
+        old_status,
+        new_status,
+        changed_by,
+        notes,
+        f"Status changed from {old_status} to {new_status}"
+    ]
+    
+    # Written in the background by the audit log queue
+    audit_log.log_entry("Log_Status", headers, log_entry)
 
 @router.get("/assets/logs/status")
 def view_status_logs(request: Request, user=Depends(get_current_user)):
@@ -288,16 +289,13 @@ def delete_asset(request: Request, asset_id: str, user=Depends(get_current_user)
             flash(request, "❌ Cannot access assets data", "error")
             return RedirectResponse(url="/assets", status_code=303)
         
-        headers = assets_ws.row_values(1)
-        data = assets_ws.get_all_values()
-        id_col = headers.index("ID") if "ID" in headers else 0
-        
         # Find and delete asset row
-        for i, row in enumerate(data[1:], start=2):
-            if len(row) > id_col and row[id_col] == asset_id:
-                assets_ws.delete_rows(i)
-                flash(request, f"✅ Asset {asset_id} deleted successfully", "success")
-                return RedirectResponse(url="/assets", status_code=303)
+        found = sheets.read_asset_row(asset_id)
+        if found:
+            row_number, _ = found
+            sheets.delete_asset_row(row_number)
+            flash(request, f"✅ Asset {asset_id} deleted successfully", "success")
+            return RedirectResponse(url="/assets", status_code=303)
         
         flash(request, f"❌ Asset {asset_id} not found", "error")
         
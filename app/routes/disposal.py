@@ -2,8 +2,10 @@
 from fastapi import APIRouter, Request, Form, Depends
 from fastapi.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
-from app.utils import sheets
-from app.database.dependencies import get_current_user
+from starlette.concurrency import run_in_threadpool
+from app.utils import sheets, audit_log, data_snapshot
+from app.database.dependencies import get_current_user, get_asset_snapshot
+from app.utils.asset_snapshot import AssetSnapshot
 from app.utils.flash import flash, get_flashed_messages
 from datetime import datetime, timezone
 
@@ -11,23 +13,30 @@ router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/disposal")
-def disposal_page(request: Request, user=Depends(get_current_user)):
+async def disposal_page(request: Request, user=Depends(get_current_user),
+                        snapshot: AssetSnapshot = Depends(get_asset_snapshot)):
     try:
-        # Get assets that can be disposed (To be Disposed status)
-        assets = sheets.get_assets("To be Disposed")
-        flash_messages = get_flashed_messages(request)
-        
-        return templates.TemplateResponse("disposal.html", {
-            "request": request,
-            "assets": assets,
-            "flash_messages": flash_messages,
-            "user": user
-        })
+        await snapshot.load_async()
+        # Render di threadpool: daftar besar tidak menahan event loop
+        return await run_in_threadpool(_render_disposal, request, snapshot, user)
         
     except Exception as e:
         flash(request, f"❌ Error loading disposal page: {str(e)}", "error")
         return RedirectResponse(url="/home", status_code=303)
 
+def _render_disposal(request: Request, snapshot: AssetSnapshot, user):
+    # Get assets that can be disposed (To be Disposed status)
+    assets = snapshot.by_status("To be Disposed")
+    flash_messages = get_flashed_messages(request)
+    
+    return templates.TemplateResponse("disposal.html", {
+        "request": request,
+        "data_as_of": data_snapshot.data_as_of(),
+        "assets": assets,
+        "flash_messages": flash_messages,
+        "user": user
+    })
+
 @router.post("/disposal/{asset_id}/dispose")
 def dispose_asset(
     request: Request,
@@ -48,37 +57,31 @@ def dispose_asset(
             flash(request, "❌ Cannot access assets data", "error")
             return RedirectResponse(url="/disposal", status_code=303)
         
-        headers = assets_ws.row_values(1)
-        data = assets_ws.get_all_values()
-        
-        status_col = headers.index("Status") if "Status" in headers else None
-        id_col = headers.index("ID") if "ID" in headers else 0
-        item_name_col = headers.index("Item Name") if "Item Name" in headers else None
-        
-        if status_col is None:
+        if sheets.get_asset_column("Status") is None:
             flash(request, "❌ Cannot find status column", "error")
             return RedirectResponse(url="/disposal", status_code=303)
         
         # Find asset and update status to Disposed
-        for i, row in enumerate(data[1:], start=2):
-            if len(row) > id_col and row[id_col] == asset_id:
-                asset_name = row[item_name_col] if item_name_col and len(row) > item_name_col else ""
-                
-                # Update status to Disposed
-                assets_ws.update_cell(i, status_col + 1, "Disposed")
-                
-                # Log disposal
-                log_disposal(
-                    asset_id=asset_id,
-                    asset_name=asset_name,
-                    disposal_method=disposal_method,
-                    disposal_value=disposal_value,
-                    disposed_by=user.get("username", "Unknown"),
-                    notes=notes
-                )
-                
-                flash(request, f"✅ Asset {asset_id} successfully disposed", "success")
-                return RedirectResponse(url="/disposal", status_code=303)
+        found = sheets.read_asset_row(asset_id)
+        if found:
+            row_number, asset = found
+            asset_name = asset.get("Item Name", "")
+            
+            # Update status to Disposed
+            sheets.update_asset_fields(row_number, {"Status": "Disposed"})
+            
+            # Log disposal
+            log_disposal(
+                asset_id=asset_id,
+                asset_name=asset_name,
+                disposal_method=disposal_method,
+                disposal_value=disposal_value,
+                disposed_by=user.get("username", "Unknown"),
+                notes=notes
+            )
+            
+            flash(request, f"✅ Asset {asset_id} successfully disposed", "success")
+            return RedirectResponse(url="/disposal", status_code=303)
         
         flash(request, f"❌ Asset {asset_id} not found", "error")
         
@@ -89,36 +92,24 @@ def dispose_asset(
 
 def log_disposal(asset_id: str, asset_name: str, disposal_method: str, 
                 disposal_value: str, disposed_by: str, notes: str = ""):
-    """Log disposal to Google Sheets"""
-    try:
-        log_ws = sheets.get_worksheet("Log_Disposal")
-        if not log_ws:
-            # Create sheet if doesn't exist
-            sheet = sheets.get_sheet()
-            log_ws = sheet.add_worksheet(title="Log_Disposal", rows=1000, cols=8)
-            # Add headers
-            headers = [
-                "Timestamp", "Asset ID", "Asset Name", "Disposal Method", 
-                "Disposal Value", "Disposed By", "Notes", "Status"
-            ]
-            log_ws.append_row(headers)
-        
-        # Add log entry
-        log_entry = [
-            datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-            asset_id,
-            asset_name,
-            disposal_method,
-            disposal_value,
-            disposed_by,
-            notes,
-            "Disposed"
-        ]
-        
-        log_ws.append_row(log_entry)
-        
-    except Exception as e:
-        print(f"Error logging disposal: {e}")
+    """Queue a disposal entry for Log_Disposal"""
+    headers = [
+        "Timestamp", "Asset ID", "Asset Name", "Disposal Method", 
+        "Disposal Value", "Disposed By", "Notes", "Status"
+    ]
+    log_entry = [
+        datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        asset_id,
+        asset_name,
+        disposal_method,
+        disposal_value,
+        disposed_by,
+        notes,
+        "Disposed"
+    ]
+    
+    # Written in the background by the audit log queue
+    audit_log.log_entry("Log_Disposal", headers, log_entry)
 
 @router.get("/disposal/logs")
 def disposal_logs(request: Request, user=Depends(get_current_user)):
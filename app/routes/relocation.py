@@ -2,8 +2,9 @@
 from fastapi import APIRouter, Request, Form, Depends
 from fastapi.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
-from app.utils import sheets
-from app.database.dependencies import get_current_user
+from app.utils import sheets, audit_log, data_snapshot
+from app.database.dependencies import get_current_user, get_asset_snapshot
+from app.utils.asset_snapshot import AssetSnapshot
 from app.utils.flash import flash, get_flashed_messages
 from datetime import datetime
 
@@ -18,6 +19,7 @@ def show_relocate_form(request: Request, user=Depends(get_current_user)):
     
     return templates.TemplateResponse("relocate.html", {
         "request": request,
+        "data_as_of": data_snapshot.data_as_of(),
         "refs": refs,
         "location_room_map": location_room_map,
         "flash_messages": flash_messages
@@ -28,10 +30,11 @@ def search_assets(
     request: Request,
     location: str = Form(...),
     room: str = Form(...),
-    user=Depends(get_current_user)
+    user=Depends(get_current_user),
+    snapshot: AssetSnapshot = Depends(get_asset_snapshot)
 ):
     try:
-        assets = sheets.get_assets("All")
+        assets = snapshot.assets
         # Assets loaded successfully
         
         filtered_assets = []
@@ -64,6 +67,7 @@ def search_assets(
         
         return templates.TemplateResponse("relocate.html", {
             "request": request,
+            "data_as_of": data_snapshot.data_as_of(),
             "refs": refs,
             "location_room_map": location_room_map,
             "flash_messages": flash_messages,
@@ -93,40 +97,28 @@ def move_asset(
             return RedirectResponse(url="/relocate", status_code=303)
         
         # Find and update asset
-        headers = assets_ws.row_values(1)
-        data = assets_ws.get_all_values()
-        
-        location_col = headers.index("Location") if "Location" in headers else None
-        room_col = headers.index("Room Location") if "Room Location" in headers else None
-        id_col = headers.index("ID") if "ID" in headers else 0
-        item_name_col = headers.index("Item Name") if "Item Name" in headers else None
-        
-        if location_col is None or room_col is None:
+        if sheets.get_asset_column("Location") is None or sheets.get_asset_column("Room Location") is None:
             flash(request, "❌ Cannot find location columns", "error")
             return RedirectResponse(url="/relocate", status_code=303)
         
         # Find asset row and get current data
-        asset_row = None
-        old_location = ""
-        old_room = ""
-        asset_name = ""
-        
-        for i, row in enumerate(data[1:], start=2):
-            if len(row) > id_col and row[id_col] == asset_id:
-                asset_row = i
-                old_location = row[location_col] if len(row) > location_col else ""
-                old_room = row[room_col] if len(row) > room_col else ""
-                asset_name = row[item_name_col] if item_name_col and len(row) > item_name_col else ""
-                break
+        found = sheets.read_asset_row(asset_id)
         
-        if asset_row:
-            # Update location and room
-            assets_ws.update_cell(asset_row, location_col + 1, new_location)
-            assets_ws.update_cell(asset_row, room_col + 1, new_room)
+        if found:
+            asset_row, asset = found
+            old_location = asset.get("Location", "")
+            old_room = asset.get("Room Location", "")
+            asset_name = asset.get("Item Name", "")
             
-            # Add location/room if not exists
             from app.utils.references import add_location_if_not_exists
-            add_location_if_not_exists(new_location, new_room)
+            
+            # Asset update and reference append are flushed together
+            with sheets.write_batch():
+                # Update location and room
+                sheets.update_asset_fields(asset_row, {"Location": new_location, "Room Location": new_room})
+                
+                # Add location/room if not exists
+                add_location_if_not_exists(new_location, new_room)
             
             # Log the relocation
             log_relocation(
@@ -151,38 +143,26 @@ def move_asset(
 
 def log_relocation(asset_id: str, asset_name: str, old_location: str, old_room: str, 
                   new_location: str, new_room: str, moved_by: str, notes: str = ""):
-    """Log relocation to Google Sheets"""
-    try:
-        log_ws = sheets.get_worksheet("Log_Relocation")
-        if not log_ws:
-            # Create sheet if doesn't exist
-            sheet = sheets.get_sheet()
-            log_ws = sheet.add_worksheet(title="Log_Relocation", rows=1000, cols=10)
-            # Add headers
-            headers = [
-                "Timestamp", "Asset ID", "Asset Name", "Old Location", "Old Room",
-                "New Location", "New Room", "Moved By", "Notes", "Status"
-            ]
-            log_ws.append_row(headers)
-        
-        # Add log entry
-        log_entry = [
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            asset_id,
-            asset_name,
-            old_location,
-            old_room,
-            new_location,
-            new_room,
-            moved_by,
-            notes,
-            "Completed"
-        ]
-        
-        log_ws.append_row(log_entry)
-        
-    except Exception as e:
-        print(f"Error logging relocation: {e}")
+    """Queue a relocation entry for Log_Relocation"""
+    headers = [
+        "Timestamp", "Asset ID", "Asset Name", "Old Location", "Old Room",
+        "New Location", "New Room", "Moved By", "Notes", "Status"
+    ]
+    log_entry = [
+        datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        asset_id,
+        asset_name,
+        old_location,
+        old_room,
+        new_location,
+        new_room,
+        moved_by,
+        notes,
+        "Completed"
+    ]
+    
+    # Written in the background by the audit log queue
+    audit_log.log_entry("Log_Relocation", headers, log_entry)
 
 @router.get("/relocate/logs")
 def view_logs(request: Request, user=Depends(get_current_user)):
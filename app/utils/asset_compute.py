@@ -0,0 +1,308 @@
+# app/utils/asset_compute.py
+import gc
+import re
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Callable, List, Optional
+
+# ========================
+# Konversi Nilai
+# ========================
+def to_decimal(value, default=Decimal(0)):
+    try:
+        return Decimal(str(value).replace(",", "").replace("Rp", "").strip())
+    except (InvalidOperation, AttributeError, ValueError):
+        return default
+
+def to_int(value, default=1):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return default
+
+_CENTS = Decimal("0.01")
+_PLAIN_AMOUNT = re.compile(r"(\d*)(?:\.(\d{1,2}))?")
+# Append RAW menyimpan tanggal dari form/import sebagai teks "=DATE(2024,06,01)"
+_DATE_FORMULA = re.compile(r"=DATE\((\d{4}),\s*\d{1,2},\s*\d{1,2}\)", re.IGNORECASE)
+
+def parse_year(purchase_date, current_year: int) -> int:
+    """Year of a Purchase Date cell, falling back to the current year"""
+    try:
+        if purchase_date:
+            # Remove any apostrophe prefix
+            clean_date = purchase_date.lstrip("'")
+            formula = _DATE_FORMULA.fullmatch(clean_date.strip())
+            if formula:
+                return int(formula.group(1))
+            # Try different date formats
+            if "-" in clean_date:
+                return datetime.strptime(clean_date, "%Y-%m-%d").year
+            if "/" in clean_date:
+                return datetime.strptime(clean_date, "%m/%d/%Y").year
+            return int(clean_date[:4]) if len(clean_date) >= 4 else current_year
+        return current_year
+    except Exception:
+        return current_year
+
+def _round_half_even(numerator: int, denominator: int) -> int:
+    """numerator / denominator rounded like Decimal.quantize (ROUND_HALF_EVEN)"""
+    quotient, remainder = divmod(numerator, denominator)
+    twice = 2 * remainder
+    if twice > denominator or (twice == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
+def _format_cents(cents: int) -> str:
+    if cents < 0:
+        return "-%d.%02d" % divmod(-cents, 100)
+    return "%d.%02d" % divmod(cents, 100)
+
+def _derive_values_decimal(cost, residual_percent: Decimal, useful_life: int, age: int):
+    """Reference per-row Decimal computation, used for values the fast path can't represent"""
+    purchase_cost = to_decimal(cost)
+    residual_value = (purchase_cost * residual_percent / 100).quantize(_CENTS)
+    depreciation_value = ((purchase_cost - residual_value) / useful_life).quantize(_CENTS) if useful_life > 0 else Decimal(0)
+    book_value = (purchase_cost - (depreciation_value * age)).quantize(_CENTS)
+    return str(residual_value), str(depreciation_value), str(book_value)
+
+def _depreciation_base(cost, info):
+    """(cents, residual text, depreciation cents, depreciation text), or False for the Decimal path"""
+    numerator = info.rp_numerator
+    if numerator is None:
+        return False
+    match = _PLAIN_AMOUNT.fullmatch(str(cost).replace(",", "").replace("Rp", "").strip())
+    if not match:
+        return False
+    whole, frac = match.groups()
+    cents = (int(whole) * 100 if whole else 0) + (int(frac.ljust(2, "0")) if frac else 0)
+    residual = _round_half_even(cents * numerator, info.rp_denominator)
+    if cents - residual < 0:
+        return False
+    if info.useful_life > 0:
+        depreciation = _round_half_even(cents - residual, info.useful_life)
+        return cents, _format_cents(residual), depreciation, _format_cents(depreciation)
+    return cents, _format_cents(residual), 0, "0"
+
+class _CategoryInfo:
+    __slots__ = ("residual_percent", "residual_text", "useful_life", "code_category",
+                 "rp_numerator", "rp_denominator")
+
+    def __init__(self, cat_ref: dict):
+        self.residual_percent = to_decimal(cat_ref.get("Residual Percent", "0"))
+        self.residual_text = str(self.residual_percent)
+        self.useful_life = to_int(cat_ref.get("Useful Life", "1"))
+        code = cat_ref.get("Code Category", "")
+        self.code_category = str(code).zfill(2) if code else ""
+
+        # residual value (cents) = cost_cents * rp_numerator / rp_denominator
+        self.rp_numerator = self.rp_denominator = None
+        if self.residual_percent.is_finite() and not self.residual_percent.is_signed():
+            _, digits, exponent = self.residual_percent.as_tuple()
+            mantissa = int("".join(map(str, digits)) or "0")
+            if exponent >= 0:
+                self.rp_numerator, self.rp_denominator = mantissa * 10 ** exponent, 100
+            else:
+                self.rp_numerator, self.rp_denominator = mantissa, 100 * 10 ** -exponent
+
+# ========================
+# Hitung Kolom Turunan (kolom per kolom)
+# ========================
+def compute_asset_columns(headers: list, rows: List[list], ref_data: dict,
+                          current_year: Optional[int] = None, first_id: int = 1,
+                          tracker: Optional[dict] = None,
+                          allocate: Optional[Callable[[tuple, int, int], List[int]]] = None) -> List[list]:
+    """Fill ID, Tahun, depreciation, reference codes and Asset Tag for every row.
+
+    Works column by column on the sheet's value matrix: each distinct Purchase
+    Date and Category is parsed once, money is computed in integer cents with
+    the same ROUND_HALF_EVEN rules as the Decimal quantize it replaces.
+
+    `first_id` and `tracker` (tag_key -> last sequence number, updated in
+    place) let rows appended after an existing register continue its IDs
+    and Asset Tag sequences.
+
+    With `allocate(key, count, floor) -> numbers` (tag_sequences.allocate_many)
+    IDs and Asset Tags are validated instead of renumbered: numeric, unique
+    IDs and valid tags are kept, the other rows get numbers from the
+    allocator (IDs under ID_SEQUENCE_KEY, above `first_id - 1` and every kept
+    ID), one call per key.
+    """
+    if current_year is None:
+        current_year = datetime.now().year
+    # Hanya alokasi list/str tanpa siklus referensi: GC cukup dijeda selama proses
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _compute_columns(headers, rows, ref_data, current_year, first_id,
+                                defaultdict(int) if tracker is None else tracker, allocate)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+def tag_key(code_company, code_type, year) -> tuple:
+    """Asset Tag sequence key: (code company, 2-digit code type, year)"""
+    return (str(code_company), str(code_type).zfill(2), str(year))
+
+# Nomor ID aset memakai tabel urutan yang sama; "ID" tidak pernah jadi tahun tag
+ID_SEQUENCE_KEY = ("", "", "ID")
+
+def _compute_columns(headers: list, rows: List[list], ref_data: dict, current_year: int,
+                     first_id: int, tracker: dict, allocate=None) -> List[list]:
+    header_map = {h: i for i, h in enumerate(headers)}
+    width = len(headers)
+    n = len(rows)
+
+    updated = [row + [""] * (width - len(row)) if len(row) < width else list(row) for row in rows]
+
+    def column(name):
+        idx = header_map.get(name)
+        if idx is None:
+            return [""] * n
+        return [row[idx] for row in updated]
+
+    # --- Tahun: parse setiap tanggal unik sekali saja
+    year_memo = {}
+    years = []
+    for value in column("Purchase Date"):
+        year = year_memo.get(value)
+        if year is None:
+            year = year_memo[value] = parse_year(value, current_year)
+        years.append(year)
+
+    # --- Kategori: referensi dibaca sekali per kategori unik
+    categories = column("Category")
+    cat_memo = {}
+    cat_infos = []
+    for value in categories:
+        info = cat_memo.get(value)
+        if info is None:
+            info = cat_memo[value] = _CategoryInfo(ref_data["categories"].get(value, {}))
+        cat_infos.append(info)
+
+    # --- Nilai uang: integer sen. Residual & depresiasi dihitung sekali per
+    # pasangan (cost, kategori) unik, per baris tinggal book value.
+    # Nilai yang tidak bisa diwakili sen (negatif, notasi aneh) pakai Decimal.
+    residual_values, depreciation_values, book_values = [], [], []
+    add_residual, add_depreciation, add_book = residual_values.append, depreciation_values.append, book_values.append
+    base_memo = {info: {} for info in cat_memo.values()}
+    format_cents = _format_cents
+    for cost, info, year in zip(column("Purchase Cost"), cat_infos, years):
+        age = current_year - year if year < current_year else 0
+        memo = base_memo[info]
+        base = memo.get(cost)
+        if base is None:
+            base = memo[cost] = _depreciation_base(cost, info)
+        if base is False:
+            residual, depreciation, book = _derive_values_decimal(cost, info.residual_percent, info.useful_life, age)
+            add_residual(residual)
+            add_depreciation(depreciation)
+            add_book(book)
+            continue
+        add_residual(base[1])
+        add_depreciation(base[3])
+        add_book(format_cents(base[0] - base[2] * age))
+
+    # --- Kode referensi
+    companies = ref_data["companies"]
+    types = ref_data["types"]
+    owners = ref_data["owners"]
+    code_companies = [companies.get(v, "") for v in column("Company")]
+    raw_code_types = [types.get((t, c), "") for t, c in zip(column("Type"), categories)]
+    code_owners = [owners.get(v, "") for v in column("Owner")]
+
+    derived = {
+        "ID": [str(first_id + i).zfill(3) for i in range(n)],
+        "Tahun": [str(y) for y in years],
+        "Residual Percent": [info.residual_text for info in cat_infos],
+        "Useful Life": [str(info.useful_life) for info in cat_infos],
+        "Residual Value": residual_values,
+        "Depreciation Value": depreciation_values,
+        "Book Value": book_values,
+        "Code Category": [info.code_category for info in cat_infos],
+        "Code Company": code_companies,
+        "Code Type": [str(c).zfill(2) if c else "" for c in raw_code_types],
+        "Code Owner": code_owners,
+    }
+
+    if allocate is not None:
+        del derived["ID"]
+    for name, values in derived.items():
+        idx = header_map.get(name)
+        if idx is None:
+            continue
+        for row, value in zip(updated, values):
+            row[idx] = value
+
+    # --- Asset Tag: nomor urut per (company, type, tahun)
+    tag_idx = header_map.get("Asset Tag")
+    if allocate is not None:
+        _allocate_ids(updated, header_map.get("ID"), first_id - 1, allocate)
+        _allocate_tags(updated, tag_idx, cat_infos, code_companies, raw_code_types,
+                       code_owners, years, tracker, allocate)
+        return updated
+
+    # Tanpa allocator: nomor urut mengikuti urutan baris di sheet
+    for i in range(n):
+        info = cat_infos[i]
+        code_company, code_type, code_owner = code_companies[i], raw_code_types[i], code_owners[i]
+        if not (code_company and info.code_category and code_type and code_owner):
+            continue
+        key = tag_key(code_company, code_type, years[i])
+        tracker[key] = tracker.get(key, 0) + 1
+        if tag_idx is not None:
+            updated[i][tag_idx] = (
+                f"{code_company}-{info.code_category}{str(code_type).zfill(2)}."
+                f"{code_owner}{str(years[i])[-2:]}.{str(tracker[key]).zfill(3)}"
+            )
+
+    return updated
+
+def _allocate_ids(updated, id_idx, floor: int, allocate) -> None:
+    """Keep every numeric, unique ID and number the rest above floor and the kept IDs"""
+    if id_idx is None:
+        return
+    pending, seen = [], set()
+    for i, row in enumerate(updated):
+        current = str(row[id_idx]).strip()
+        if current.isdigit() and int(current) not in seen:
+            seen.add(int(current))
+        else:
+            pending.append(i)
+    if not pending:
+        return
+    values = allocate(ID_SEQUENCE_KEY, len(pending), max(max(seen, default=0), floor))
+    for i, value in zip(pending, values):
+        updated[i][id_idx] = str(value).zfill(3)
+
+def _allocate_tags(updated, tag_idx, cat_infos, code_companies, raw_code_types,
+                   code_owners, years, tracker, allocate) -> None:
+    """Keep every valid, unique Asset Tag and number the rest with `allocate(key, count, floor)`.
+
+    A tag is valid when it starts with the prefix its row's codes give and ends
+    in a numeric sequence. Kept sequences are collected first and passed as the
+    floor, so the allocator never hands out a number already used in the sheet.
+    """
+    pending, seen = {}, set()  # key -> [(baris, prefix)] dalam urutan sheet
+    for i, info in enumerate(cat_infos):
+        code_company, code_type, code_owner = code_companies[i], raw_code_types[i], code_owners[i]
+        if not (code_company and info.code_category and code_type and code_owner):
+            continue
+        key = tag_key(code_company, code_type, years[i])
+        prefix = f"{code_company}-{info.code_category}{key[1]}.{code_owner}{str(years[i])[-2:]}."
+        current = str(updated[i][tag_idx]).strip() if tag_idx is not None else ""
+        sequence = current[len(prefix):]
+        if current.startswith(prefix) and sequence.isdigit() and current not in seen:
+            seen.add(current)
+            tracker[key] = max(tracker.get(key, 0), int(sequence))
+        else:
+            pending.setdefault(key, []).append((i, prefix))
+
+    # Satu alokasi per kunci untuk semua baris yang butuh nomor
+    for key, targets in pending.items():
+        values = allocate(key, len(targets), tracker.get(key, 0))
+        tracker[key] = max(tracker.get(key, 0), values[-1])
+        if tag_idx is None:
+            continue
+        for (i, prefix), value in zip(targets, values):
+            updated[i][tag_idx] = f"{prefix}{str(value).zfill(3)}"
@@ -0,0 +1,131 @@
+# app/utils/asset_import.py
+import io
+import os
+import csv
+import logging
+from datetime import date, datetime
+from typing import Iterator, Tuple
+
+from pydantic import ValidationError
+
+from app.utils import sheets
+from app.utils.models import Asset
+from app.utils.references import (
+    validate_category_or_default, add_type_if_not_exists, add_location_if_not_exists,
+    add_company_with_code_if_not_exists, add_owner_if_not_exists,
+)
+
+# ========================
+# Import Aset Massal (CSV / XLSX)
+# ========================
+# File dibaca baris per baris (csv reader / openpyxl read-only), setiap baris
+# divalidasi dengan model Asset. Referensi baru didaftarkan lewat indeks
+# referensi (satu batch append), semua baris valid ditulis dengan satu
+# append_rows, lalu kolom turunan dan Asset Tag dihitung sekali oleh sync.
+MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", "10000"))
+
+def _field_name(header) -> str:
+    """'Item Name' / 'item_name' / 'Room Location' -> Asset field name"""
+    return str(header or "").strip().lower().replace(" ", "_").replace("-", "_")
+
+FIELDS = set(Asset.model_fields)
+# Status yang sama dengan pilihan di halaman asset (dicocokkan tanpa beda huruf besar/kecil)
+STATUSES = {s.lower(): s for s in ("Active", "In Storage", "Under Repair", "To be Disposed", "Disposed")}
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+def _records(headers, rows) -> Iterator[Tuple[int, dict]]:
+    fields = [_field_name(h) for h in headers]
+    for line, row in rows:
+        values = [_cell(v) for v in row]
+        if not any(values):
+            continue
+        yield line, {f: v for f, v in zip(fields, values) if f in FIELDS and v != ""}
+
+def _iter_csv(file) -> Iterator[Tuple[int, dict]]:
+    reader = csv.reader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+    headers = next(reader, [])
+    yield from _records(headers, ((reader.line_num, row) for row in reader))
+
+def _iter_xlsx(file) -> Iterator[Tuple[int, dict]]:
+    from openpyxl import load_workbook
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = next(rows, ())
+        yield from _records(headers, ((i, row) for i, row in enumerate(rows, start=2)))
+    finally:
+        workbook.close()
+
+def iter_rows(filename: str, file) -> Iterator[Tuple[int, dict]]:
+    """(line number, {asset field: value}) per non-empty data row"""
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return _iter_csv(file)
+    if name.endswith(".xlsx") or name.endswith(".xlsm"):
+        return _iter_xlsx(file)
+    raise ValueError("Unsupported file type, upload a .csv or .xlsx file")
+
+def _validate(fields: dict) -> Asset:
+    asset = Asset(**fields)
+    try:
+        datetime.strptime(asset.purchase_date, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError("purchase_date must be YYYY-MM-DD")
+    status = STATUSES.get(asset.status.strip().lower())
+    if not status:
+        raise ValueError(f"status must be one of: {', '.join(STATUSES.values())}")
+    asset.status = status
+    return asset
+
+def import_assets(filename: str, file, dry_run: bool = False) -> dict:
+    """Validate every row, register missing references, append valid rows at once and sync once"""
+    errors, assets = [], []
+    for line, fields in iter_rows(filename, file):
+        if len(assets) + len(errors) >= MAX_ROWS:
+            errors.append({"row": line, "errors": [f"Import is limited to {MAX_ROWS} rows"]})
+            break
+        try:
+            assets.append(_validate(fields))
+        except ValidationError as e:
+            errors.append({"row": line, "errors": [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()]})
+        except ValueError as e:
+            errors.append({"row": line, "errors": [str(e)]})
+
+    report = {"success": not errors, "valid": len(assets), "imported": 0, "failed": len(errors), "errors": errors}
+    if dry_run or not assets:
+        return report
+
+    rows = []
+    with sheets.write_batch():
+        for asset in assets:
+            data = {k: ("" if v is None else v) for k, v in asset.model_dump().items()}
+            data["category"] = validate_category_or_default(data["category"])
+            company_name, _, code = data["company"].partition(" (")
+            data["company"] = company_name
+            add_type_if_not_exists(data["type"], data["category"])
+            add_location_if_not_exists(data["location"], data["room_location"])
+            add_company_with_code_if_not_exists(company_name, code.rstrip(")"))
+            add_owner_if_not_exists(data["owner"], "")
+            rows.append(sheets.asset_row_values(data))
+
+    ws = sheets.get_worksheet("Assets")
+    if not ws:
+        raise ConnectionError("Assets worksheet not found")
+    sheets.append_rows(ws, rows)
+    report["imported"] = len(rows)
+    logging.info(f"Imported {len(rows)} assets from {filename} ({len(errors)} rows rejected)")
+
+    # Kolom turunan & Asset Tag untuk semua baris baru sekaligus
+    sync_result = sheets.sync_assets_data()
+    report["sync"] = sync_result.get("message")
+    return report
@@ -0,0 +1,57 @@
+# app/utils/asset_snapshot.py
+import asyncio
+from typing import List, Optional
+
+from app.utils import sheets, asset_store
+from app.utils.asset_store import asset_id_key
+
+# ========================
+# Snapshot Aset per Request
+# ========================
+class AssetSnapshot:
+    """Assets register fetched at most once per request; views are derived in memory"""
+
+    def __init__(self):
+        self._assets: Optional[List[dict]] = None
+
+    @property
+    def assets(self) -> List[dict]:
+        if self._assets is None:
+            self._assets = sheets.get_assets("All")
+        return self._assets
+
+    async def load_async(self) -> "AssetSnapshot":
+        """Fetch the register without blocking the event loop (async routes)"""
+        if self._assets is None:
+            self._assets = await sheets.get_assets_async("All")
+        return self
+
+    def by_status(self, status_filter: str = "All") -> List[dict]:
+        if status_filter == "All":
+            return self.assets
+        wanted = status_filter.lower()
+        return [row for row in self.assets if str(row.get("Status", "")).lower() == wanted]
+
+    def find(self, asset_id: str) -> Optional[dict]:
+        if self._assets is None:
+            # Belum ada data di memori: cukup lookup satu aset lewat indeks
+            return sheets.get_asset(asset_id)
+        key = asset_id_key(asset_id)
+        return next((a for a in self.assets if asset_id_key(a.get("ID", "")) == key), None)
+
+    async def find_async(self, asset_id: str) -> Optional[dict]:
+        if self._assets is None and asset_store.is_ready():
+            asset = await asyncio.to_thread(asset_store.find, asset_id)
+            if asset is not None or asset_store.is_ready():
+                return asset
+        await self.load_async()
+        return self.find(asset_id)
+
+    def locations(self) -> List[str]:
+        return sorted({str(a.get("Location", "")).strip() for a in self.assets} - {""})
+
+    def rooms(self, location: str) -> List[str]:
+        return sorted({
+            str(a.get("Room Location", "")).strip() for a in self.assets
+            if str(a.get("Location", "")).strip() == location
+        } - {""})
@@ -0,0 +1,172 @@
+# app/utils/asset_store.py
+import logging
+from typing import List, Optional
+
+from sqlalchemy import delete, insert, select, update
+
+from app.database.database import SessionLocal
+from app.utils.models import AssetRecord
+
+# ========================
+# Read Model Aset (PostgreSQL)
+# ========================
+# Google Sheets tetap menjadi system of record. Tabel `assets` hanya cermin
+# baris sheet "Assets" (row_number = nomor baris di sheet) supaya halaman
+# list/detail/dashboard tidak perlu memanggil Sheets API. Tabel tetap ada
+# setelah restart, jadi saat startup mirror langsung dipakai (restore) sambil
+# register dibaca ulang di background.
+_ready = False
+
+def asset_id_key(value) -> str:
+    """Normalize asset ID so '001', '1' and 1 match the same row"""
+    text = str(value if value is not None else "").strip()
+    return text.lstrip("0") or ("0" if text else "")
+
+def _to_row(record: dict, row_number: int) -> dict:
+    return {
+        "row_number": row_number,
+        "asset_id": asset_id_key(record.get("ID", "")) or None,
+        "asset_tag": str(record.get("Asset Tag", "")).strip() or None,
+        "status_key": str(record.get("Status", "")).strip().lower(),
+        "location": str(record.get("Location", "")).strip(),
+        "room_location": str(record.get("Room Location", "")).strip(),
+        "data": record,
+    }
+
+def _apply_fields(record: AssetRecord, fields: dict) -> None:
+    data = dict(record.data or {})
+    data.update(fields)
+    for key, value in _to_row(data, record.row_number).items():
+        setattr(record, key, value)
+
+def is_ready() -> bool:
+    return _ready
+
+def restore() -> bool:
+    """Startup: a non-empty table left by the previous process is usable until the next full reload"""
+    global _ready
+    db = SessionLocal()
+    try:
+        _ready = db.execute(select(AssetRecord.id).limit(1)).first() is not None
+    except Exception as e:
+        _ready = False
+        logging.warning(f"Gagal membaca mirror aset saat startup: {e}")
+    finally:
+        db.close()
+    return _ready
+
+def invalidate() -> None:
+    """Force the next read to reload the mirror from Sheets"""
+    global _ready
+    _ready = False
+
+def replace_all(records: List[dict]) -> bool:
+    """Replace the whole mirror with records in sheet order (row 2 onwards)"""
+    global _ready
+    db = SessionLocal()
+    try:
+        db.execute(delete(AssetRecord))
+        if records:
+            db.execute(insert(AssetRecord), [_to_row(r, i) for i, r in enumerate(records, start=2)])
+        db.commit()
+        _ready = True
+        return True
+    except Exception as e:
+        db.rollback()
+        _ready = False
+        logging.warning(f"Gagal menyimpan mirror aset ke database: {e}")
+        return False
+    finally:
+        db.close()
+
+def load(status_filter: str = "All") -> Optional[List[dict]]:
+    """Return mirrored records, or None when the mirror is not usable"""
+    if not _ready:
+        return None
+    db = SessionLocal()
+    try:
+        query = select(AssetRecord.data).order_by(AssetRecord.row_number)
+        if status_filter != "All":
+            query = query.where(AssetRecord.status_key == status_filter.strip().lower())
+        return list(db.execute(query).scalars())
+    except Exception as e:
+        invalidate()
+        logging.warning(f"Gagal membaca mirror aset: {e}")
+        return None
+    finally:
+        db.close()
+
+def find(asset_id: str) -> Optional[dict]:
+    """Look up one asset by ID through the asset_id index"""
+    if not _ready:
+        return None
+    db = SessionLocal()
+    try:
+        query = (
+            select(AssetRecord.data)
+            .where(AssetRecord.asset_id == asset_id_key(asset_id))
+            .order_by(AssetRecord.row_number)
+        )
+        return db.execute(query).scalars().first()
+    except Exception as e:
+        invalidate()
+        logging.warning(f"Gagal mencari aset {asset_id} di mirror: {e}")
+        return None
+    finally:
+        db.close()
+
+def append_row(row_number: int, record: dict) -> None:
+    """Mirror a row appended to the sheet at `row_number`"""
+    if not _ready:
+        return
+    db = SessionLocal()
+    try:
+        db.execute(insert(AssetRecord), [_to_row(record, row_number)])
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        invalidate()
+        logging.warning(f"Gagal menambah baris {row_number} ke mirror: {e}")
+    finally:
+        db.close()
+
+def update_row(row_number: int, fields: dict) -> None:
+    """Apply cell changes written to sheet row `row_number`"""
+    if not _ready:
+        return
+    db = SessionLocal()
+    try:
+        record = db.execute(
+            select(AssetRecord).where(AssetRecord.row_number == row_number)
+        ).scalars().first()
+        if record is None:
+            invalidate()
+            return
+        _apply_fields(record, fields)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        invalidate()
+        logging.warning(f"Gagal update mirror baris {row_number}: {e}")
+    finally:
+        db.close()
+
+def delete_row(row_number: int) -> None:
+    """Mirror `delete_rows(row_number)`: drop the row and shift the rest up"""
+    if not _ready:
+        return
+    db = SessionLocal()
+    try:
+        db.execute(delete(AssetRecord).where(AssetRecord.row_number == row_number))
+        db.execute(
+            update(AssetRecord)
+            .where(AssetRecord.row_number > row_number)
+            .values(row_number=AssetRecord.row_number - 1)
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        invalidate()
+        logging.warning(f"Gagal hapus baris {row_number} dari mirror: {e}")
+    finally:
+        db.close()
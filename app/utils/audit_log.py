@@ -0,0 +1,142 @@
+# app/utils/audit_log.py
+import os
+import queue
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List
+
+from app.utils import sheet_version
+
+# ========================
+# Antrian Log Audit (Log_Status, Log_Relocation, Log_Disposal)
+# ========================
+# Entri log diterima langsung (request tidak menunggu Sheets) lalu ditulis
+# oleh satu worker background dengan append_rows per worksheet, setiap
+# BATCH_SIZE entri atau FLUSH_INTERVAL detik. Batch yang gagal dicoba ulang
+# dengan backoff; sisa antrian di-flush saat shutdown.
+BATCH_SIZE = int(os.getenv("AUDIT_LOG_BATCH_SIZE", "50"))
+FLUSH_INTERVAL = int(os.getenv("AUDIT_LOG_FLUSH_MS", "500")) / 1000
+MAX_QUEUE_SIZE = int(os.getenv("AUDIT_LOG_MAX_QUEUE", "5000"))
+MAX_RETRIES = 5
+
+class AuditLogQueue:
+    def __init__(self, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL,
+                 max_size: int = MAX_QUEUE_SIZE, max_retries: int = MAX_RETRIES):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._queue = queue.Queue(maxsize=max_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        """Flush everything still queued, then stop the worker"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logging.warning(f"Audit log writer still busy after {timeout}s, {self._queue.qsize()} entries pending")
+
+    def enqueue(self, sheet_name: str, headers: List[str], row: list) -> None:
+        self.start()
+        try:
+            self._queue.put_nowait((sheet_name, tuple(headers), row))
+        except queue.Full:
+            # Antrian penuh (Sheets lama tidak bisa diakses): tulis langsung
+            logging.warning(f"Audit log queue full, writing {sheet_name} entry synchronously")
+            try:
+                self._write(sheet_name, headers, [row])
+            except Exception as e:
+                logging.error(f"Error logging to {sheet_name}: {e} {row}")
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self) -> None:
+        from app.utils.quota import background_priority  # avoid circular import
+        with background_priority():
+            self._drain()
+
+    def _drain(self) -> None:
+        batch = []
+        deadline = None
+        while True:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            except queue.Empty:
+                pass
+
+            stopping = self._stop.is_set()
+            if stopping:
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+            due = deadline is not None and time.monotonic() >= deadline
+            if batch and (len(batch) >= self.batch_size or due or stopping):
+                self._flush(batch)
+                batch, deadline = [], None
+
+            if stopping and self._queue.empty():
+                return
+
+    def _flush(self, batch: list) -> None:
+        grouped = OrderedDict()
+        for sheet_name, headers, row in batch:
+            grouped.setdefault((sheet_name, headers), []).append(row)
+
+        for (sheet_name, headers), rows in grouped.items():
+            for attempt in range(self.max_retries):
+                try:
+                    self._write(sheet_name, list(headers), rows)
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries - 1:
+                        logging.error(f"Dropping {len(rows)} {sheet_name} entries after {attempt + 1} attempts: {e} {rows}")
+                        break
+                    # Saat shutdown tetap dicoba ulang, tapi dengan jeda pendek
+                    wait_time = 0.5 if self._stop.is_set() else min(30, 2 ** attempt)
+                    logging.warning(f"Audit log flush to {sheet_name} failed, retrying in {wait_time}s: {e}")
+                    time.sleep(wait_time)
+
+    @staticmethod
+    def _write(sheet_name: str, headers: List[str], rows: list) -> None:
+        from app.utils.sheets import get_or_create_worksheet  # avoid circular import
+        ws = get_or_create_worksheet(sheet_name, headers)
+        if ws is None:
+            raise RuntimeError(f"Worksheet {sheet_name} not available")
+        token = sheet_version.begin_write()
+        ws.append_rows(rows)
+        # Sheet log tidak di-cache: perubahan versi ini tidak perlu baca ulang
+        sheet_version.end_write(token)
+
+_audit_queue = AuditLogQueue()
+
+def log_entry(sheet_name: str, headers: List[str], row: list) -> None:
+    """Queue one audit row; returns immediately"""
+    _audit_queue.enqueue(sheet_name, headers, row)
+
+def start() -> None:
+    _audit_queue.start()
+
+def shutdown(timeout: float = 10) -> None:
+    _audit_queue.stop(timeout)
+
+def pending() -> int:
+    return _audit_queue.pending()
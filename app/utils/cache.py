@@ -1,42 +1,201 @@
 # app/cache.py
-from functools import wraps
-from time import time
-from typing import Callable, Any, Optional, Dict, Tuple
-import hashlib
-import pickle
+import os
+import sys
+import asyncio
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from time import monotonic
+from typing import Callable, Any, Optional, Hashable
 
-_cache: Dict[str, Tuple[Any, float]] = {}
 _default_ttl = 300
 _max_cache_size = 1000
+_max_cache_bytes = int(os.getenv("CACHE_MAX_BYTES", "0"))  # 0 = tanpa batas ukuran
+
+_MISSING = object()
+
+def _estimate_size(value: Any, _depth: int = 0) -> int:
+    """Rough in-memory size of a cached value (computed once, on insert)"""
+    size = sys.getsizeof(value)
+    if _depth >= 4:
+        return size
+    if isinstance(value, dict):
+        size += sum(_estimate_size(k, _depth + 1) + _estimate_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_estimate_size(v, _depth + 1) for v in value)
+    return size
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size")
+
+    def __init__(self, value: Any, expires_at: float, size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+class LRUCache:
+    """Thread-safe LRU cache with a TTL per entry and optional byte budget.
+
+    Every operation is O(1) except eviction, which pops from the LRU end.
+    """
+
+    def __init__(self, max_entries: int = _max_cache_size, max_bytes: int = _max_cache_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = _MISSING) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry.expires_at <= monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def peek(self, key: Hashable, default: Any = _MISSING) -> Any:
+        """Like get() but without touching hit/miss stats or the LRU order"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry.expires_at <= monotonic():
+                return default
+            return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        size = _estimate_size(value) if self.max_bytes else 0
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = _Entry(value, monotonic() + ttl, size)
+            self._bytes += size
+            while self._data and (len(self._data) > self.max_entries or
+                                  (self.max_bytes and self._bytes > self.max_bytes and len(self._data) > 1)):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._data.pop(key)
+        self._bytes -= entry.size
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = monotonic()
+            expired = sum(1 for entry in self._data.values() if entry.expires_at <= now)
+            lookups = self.hits + self.misses
+            return {
+                "total_entries": len(self._data),
+                "expired_entries": expired,
+                "active_entries": len(self._data) - expired,
+                "max_size": self.max_entries,
+                "bytes": self._bytes if self.max_bytes else None,
+                "max_bytes": self.max_bytes or None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution.
+
+    The first caller runs `fn`; callers arriving while it is in flight wait
+    and get the same result, or the same exception re-raised.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executions = self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.shared += 1
 
-def _generate_key(fn: Callable, args: tuple, kwargs: dict) -> str:
-    """Generate optimized cache key"""
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines: concurrent awaiters share one task"""
+
+    def __init__(self):
+        self._tasks = {}
+
+    async def do(self, key: Hashable, fn: Callable) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        # shield: pemanggil yang dibatalkan tidak membatalkan load bersama
+        return await asyncio.shield(task)
+
+_cache = LRUCache()
+_flight = SingleFlight()
+
+# Stale-while-revalidate: satu refresh background per key
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+_refreshing = set()
+_refresh_lock = threading.Lock()
+
+def _generate_key(fn: Callable, args: tuple, kwargs: dict) -> Hashable:
+    """Cheap cache key: the call itself as a tuple"""
+    key = (fn.__module__, fn.__qualname__, args, tuple(sorted(kwargs.items())) if kwargs else ())
     try:
-        # Use pickle for consistent serialization
-        key_data = (fn.__module__, fn.__name__, args, tuple(sorted(kwargs.items())))
-        serialized = pickle.dumps(key_data)
-        return hashlib.md5(serialized).hexdigest()
-    except (TypeError, pickle.PicklingError):
-        # Fallback for unpicklable objects
-        return f"{fn.__module__}:{fn.__name__}:{hash(args)}:{hash(tuple(sorted(kwargs.items())))}"
-
-def _cleanup_cache():
-    """Remove expired entries and enforce size limit"""
-    if len(_cache) <= _max_cache_size:
-        return
-    
-    now = time()
-    # Remove expired entries first
-    expired_keys = [k for k, (_, ts) in _cache.items() if now - ts > _default_ttl * 2]
-    for key in expired_keys:
-        _cache.pop(key, None)
-    
-    # If still over limit, remove oldest entries
-    if len(_cache) > _max_cache_size:
-        sorted_items = sorted(_cache.items(), key=lambda x: x[1][1])
-        for key, _ in sorted_items[:len(_cache) - _max_cache_size]:
-            _cache.pop(key, None)
+        hash(key)
+        return key
+    except TypeError:
+        # Fallback for unhashable arguments (lists, dicts)
+        return (fn.__module__, fn.__qualname__, repr(args), repr(sorted(kwargs.items())))
 
 def cached(ttl: Optional[int] = None) -> Callable:
     """Decorator to cache function results"""
@@ -46,58 +205,107 @@ def cached(ttl: Optional[int] = None) -> Callable:
         @wraps(fn)
         def wrapper(*args, **kwargs):
             key = _generate_key(fn, args, kwargs)
-            now = time()
-            
-            # Check cache
-            if key in _cache:
-                data, timestamp = _cache[key]
-                if now - timestamp < cache_ttl:
+            data = _cache.get(key)
+            if data is not _MISSING:
+                return data
+
+            def load():
+                # Cek ulang: pemanggil sebelumnya mungkin sudah mengisi cache
+                data = _cache.peek(key)
+                if data is not _MISSING:
                     return data
-            
-            # Execute function
-            try:
-                data = fn(*args, **kwargs)
-                _cache[key] = (data, now)
-                
-                # Periodic cleanup
-                if len(_cache) % 100 == 0:
-                    _cleanup_cache()
-                    
+                try:
+                    data = fn(*args, **kwargs)
+                except Exception as e:
+                    logging.warning(f"Cache error for {fn.__name__}: {e}")
+                    raise
+                _cache.set(key, data, cache_ttl)
                 return data
-            except Exception as e:
-                logging.warning(f"Cache error for {fn.__name__}: {e}")
-                raise
+
+            return _flight.do(key, load)
         return wrapper
     return decorator
 
-def get_cached_data(key: str, builder: Callable, timeout: int = 300) -> Any:
-    """Get cached data or build it"""
-    now = time()
-    
-    if key in _cache:
-        value, timestamp = _cache[key]
-        if now - timestamp < timeout:
-            return value
-    
-    value = builder()
-    _cache[key] = (value, now)
-    return value
+def get_cached_data(key: str, builder: Callable, timeout: int = 300,
+                    stale_timeout: Optional[int] = None) -> Any:
+    """Get cached data or build it.
+
+    With `stale_timeout` (hard TTL, > timeout) the entry is served
+    stale-while-revalidate: after `timeout` seconds the old value is returned
+    immediately and rebuilt in the background; only past `stale_timeout`
+    does the caller block on `builder`.
+    """
+    cached_entry = _cache.get(key)
+    if cached_entry is not _MISSING:
+        value, fresh_until = cached_entry
+        if monotonic() >= fresh_until:
+            _refresh_in_background(key, builder, timeout, stale_timeout)
+        return value
+
+    def load():
+        # Cek ulang tanpa menghitung miss kedua untuk lookup yang sama
+        cached_entry = _cache.peek(key)
+        if cached_entry is not _MISSING:
+            return cached_entry[0]
+        value = builder()
+        _store(key, value, timeout, stale_timeout)
+        return value
+
+    # Cache kosong: request bersamaan menunggu satu builder saja
+    return _flight.do(key, load)
+
+def _store(key: str, value: Any, timeout: int, stale_timeout: Optional[int]) -> None:
+    hard_ttl = max(timeout, stale_timeout or timeout)
+    _cache.set(key, (value, monotonic() + timeout), hard_ttl)
+
+def _refresh_in_background(key: str, builder: Callable, timeout: int, stale_timeout: Optional[int]) -> None:
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def build():
+        value = builder()
+        _store(key, value, timeout, stale_timeout)
+        return value
+
+    def refresh():
+        from app.utils.quota import background_priority  # refresh tidak boleh mengambil jatah interaktif
+        try:
+            with background_priority():
+                _flight.do(key, build)
+        except Exception as e:
+            logging.warning(f"Background refresh of '{key}' failed, serving stale value: {e}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(key)
+
+    try:
+        _refresh_executor.submit(refresh)
+    except RuntimeError:
+        # Executor sudah dimatikan (shutdown interpreter)
+        with _refresh_lock:
+            _refreshing.discard(key)
+
+def peek_cached_data(key: str) -> Any:
+    """Cached value for a get_cached_data() key without building it; None on a miss (not counted in stats)"""
+    cached_entry = _cache.peek(key)
+    return None if cached_entry is _MISSING else cached_entry[0]
+
+def seed_cache(key: str, value: Any, stale_timeout: int) -> None:
+    """Insert an already-stale value (e.g. from disk): served at once, refreshed on first use"""
+    _cache.set(key, (value, monotonic()), stale_timeout)
 
 def clear_cache(key: Optional[str] = None) -> None:
     """Clear cache entries"""
     if key:
-        _cache.pop(key, None)
+        _cache.pop(key)
     else:
         _cache.clear()
 
 def get_cache_stats() -> dict:
     """Get cache statistics"""
-    now = time()
-    expired = sum(1 for _, ts in _cache.values() if now - ts > _default_ttl)
-    return {
-        "total_entries": len(_cache),
-        "expired_entries": expired,
-        "active_entries": len(_cache) - expired,
-        "max_size": _max_cache_size
-    }
-
+    stats = _cache.stats()
+    stats["loads"] = _flight.executions
+    stats["coalesced_loads"] = _flight.shared
+    return stats
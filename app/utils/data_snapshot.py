@@ -0,0 +1,121 @@
+# app/utils/data_snapshot.py
+import os
+import json
+import zlib
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.database.database import SessionLocal
+from app.utils.models import DataSnapshot
+
+# ========================
+# Snapshot Data (Assets & Ref_*)
+# ========================
+# Hasil baca penuh terakhir yang berhasil disimpan di tabel data_snapshots
+# PostgreSQL (JSON terkompresi per dataset + versi), bukan di disk lokal:
+# filesystem instance Render hilang setiap spin-down. Saat startup tabel
+# dibaca ke memori sehingga halaman pertama tidak perlu menunggu Sheets;
+# kalau Sheets tidak bisa diakses, data ini dipakai read-only dan halaman
+# menampilkan "data per <waktu>".
+# Setelah gagal, Sheets baru dicoba lagi setelah jeda ini (request tidak ikut menunggu timeout)
+RETRY_AFTER = int(os.getenv("SNAPSHOT_RETRY_SECONDS", "60"))
+
+_lock = threading.Lock()
+_memory = {}   # name -> {"payload", "saved_at", "version"}
+_stale = {}    # name -> monotonic waktu gagal terakhir (dataset sedang dilayani dari snapshot)
+_preloaded = False
+
+def save(name: str, payload: Any) -> None:
+    """Persist the latest good copy of a dataset; errors are logged, never raised"""
+    try:
+        blob = zlib.compress(json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8"))
+        version = hashlib.sha1(blob).hexdigest()[:12]
+        saved_at = time.time()
+        with _lock:
+            current = _memory.get(name)
+            unchanged = current is not None and current["version"] == version
+            db = SessionLocal()
+            try:
+                if unchanged:
+                    db.execute(update(DataSnapshot).where(DataSnapshot.name == name).values(saved_at=saved_at))
+                else:
+                    statement = insert(DataSnapshot).values(name=name, version=version, saved_at=saved_at, payload=blob)
+                    db.execute(statement.on_conflict_do_update(
+                        index_elements=[DataSnapshot.name],
+                        set_={"version": version, "saved_at": saved_at, "payload": blob},
+                    ))
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+            _memory[name] = {"payload": payload, "saved_at": saved_at, "version": version}
+            _stale.pop(name, None)
+    except Exception as e:
+        logging.warning(f"Failed to write snapshot '{name}': {e}")
+
+def preload() -> None:
+    """Read every dataset from the database into memory (startup, no Sheets call)"""
+    global _preloaded
+    _preloaded = True
+    try:
+        db = SessionLocal()
+        try:
+            rows = db.execute(select(
+                DataSnapshot.name, DataSnapshot.version, DataSnapshot.saved_at, DataSnapshot.payload,
+            )).all()
+        finally:
+            db.close()
+        with _lock:
+            for name, version, saved_at, blob in rows:
+                _memory.setdefault(name, {
+                    "payload": json.loads(zlib.decompress(blob)),
+                    "saved_at": saved_at,
+                    "version": version,
+                })
+        logging.info(f"Snapshot loaded: {', '.join(name for name, *_ in rows) or 'empty'}")
+    except Exception as e:
+        logging.warning(f"Failed to read snapshot from database: {e}")
+
+def load(name: str) -> Optional[Any]:
+    entry = _memory.get(name)
+    if entry is None and not _preloaded:
+        preload()
+        entry = _memory.get(name)
+    return entry["payload"] if entry else None
+
+def mark_unreachable(name: str) -> None:
+    """A live read failed: serve `name` from the snapshot for RETRY_AFTER seconds"""
+    _stale[name] = time.monotonic()
+
+def should_try_live(name: str) -> bool:
+    failed_at = _stale.get(name)
+    return failed_at is None or time.monotonic() - failed_at >= RETRY_AFTER or name not in _memory
+
+def serving_snapshot(name: str) -> bool:
+    return name in _stale
+
+def data_as_of() -> Optional[str]:
+    """'YYYY-MM-DD HH:MM UTC' of the oldest dataset served from the snapshot, or None when all data is live"""
+    saved = [_memory[name]["saved_at"] for name in list(_stale) if name in _memory]
+    if not saved:
+        return None
+    return datetime.fromtimestamp(min(saved), timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+
+def get_stats() -> dict:
+    return {
+        name: {
+            "version": entry["version"],
+            "saved_at": datetime.fromtimestamp(entry["saved_at"], timezone.utc).isoformat(),
+            "serving_from_snapshot": name in _stale,
+        }
+        for name, entry in list(_memory.items())
+    }
@@ -0,0 +1,76 @@
+# app/utils/google_async.py
+import os
+import asyncio
+from typing import List, Optional
+from urllib.parse import quote
+
+import httpx
+
+from app.utils import quota, google_auth
+
+# ========================
+# Client Async Google Sheets
+# ========================
+# Route async membaca Sheets lewat satu httpx.AsyncClient bersama
+# (koneksi keep-alive di-pool), jadi request yang menunggu Google tidak
+# memegang worker threadpool. Request Sheets tetap lewat token bucket kuota.
+SCOPES = google_auth.SHEETS_SCOPES
+SHEETS_URL = "https://sheets.googleapis.com/v4/spreadsheets"
+MAX_CONNECTIONS = int(os.getenv("GOOGLE_HTTP_MAX_CONNECTIONS", "20"))
+
+class GoogleAPIError(Exception):
+    def __init__(self, response: httpx.Response):
+        self.response = response
+        self.status_code = response.status_code
+        super().__init__(f"{response.request.method} {response.request.url.path}: {response.status_code} - {response.text[:500]}")
+
+_client: Optional[httpx.AsyncClient] = None
+
+async def get_token() -> str:
+    creds = google_auth.get_credentials(SCOPES)
+    if creds.valid:
+        return creds.token
+    return await asyncio.to_thread(google_auth.get_token, SCOPES)
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+            timeout=httpx.Timeout(30.0, connect=10.0),
+        )
+    return _client
+
+async def aclose() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def request(method: str, url: str, expected=(200,), **kwargs) -> httpx.Response:
+    """Authorized request; Sheets calls spend quota tokens like the gspread session"""
+    headers = dict(kwargs.pop("headers", None) or {})
+    headers["Authorization"] = f"Bearer {await get_token()}"
+    response = await quota.request_async(get_client(), method, url, headers=headers, **kwargs)
+    if response.status_code not in expected:
+        raise GoogleAPIError(response)
+    return response
+
+# ========================
+# Sheets Values API
+# ========================
+def _spreadsheet_url(suffix: str) -> str:
+    sheet_id = os.getenv("GOOGLE_SHEET_ID")
+    if not sheet_id:
+        raise RuntimeError("Google Sheets credentials or sheet ID not set.")
+    return f"{SHEETS_URL}/{sheet_id}{suffix}"
+
+def a1_range(sheet_name: str, cells: str = "") -> str:
+    """'Sheet Name'!A1:B2 (whole sheet when cells is empty)"""
+    name = "'" + sheet_name.replace("'", "''") + "'"
+    return f"{name}!{cells}" if cells else name
+
+async def values_get(range_name: str, value_render_option: str = "FORMATTED_VALUE") -> List[list]:
+    response = await request("GET", _spreadsheet_url(f"/values/{quote(range_name, safe='')}"),
+                             params={"valueRenderOption": value_render_option})
+    return response.json().get("values", [])
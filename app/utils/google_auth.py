@@ -0,0 +1,110 @@
+# app/utils/google_auth.py
+import os
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Sequence, Tuple
+
+from google.oauth2.service_account import Credentials
+from google.auth.transport.requests import Request
+
+from app.utils import http_pool
+
+# ========================
+# Credentials & Token Google (satu sumber)
+# ========================
+# GOOGLE_CREDS_JSON di-parse sekali. Credentials dibuat sekali per set scope
+# dan dipakai bersama oleh gspread, client async, probe versi dan upload foto.
+# Worker background me-refresh token sebelum kedaluwarsa, jadi request
+# biasanya tidak pernah menunggu refresh token.
+SHEETS_SCOPES = ("https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive")
+DRIVE_SCOPES = ("https://www.googleapis.com/auth/drive.file",)
+REFRESH_MARGIN = timedelta(seconds=int(os.getenv("GOOGLE_TOKEN_REFRESH_MARGIN", "600")))
+CHECK_INTERVAL = 60
+
+_info = None
+_credentials: Dict[Tuple[str, ...], Credentials] = {}
+_locks: Dict[Tuple[str, ...], threading.Lock] = {}
+_lock = threading.Lock()
+_stop = threading.Event()
+_thread = None
+stats = {"refreshes": 0, "background_refreshes": 0, "refresh_errors": 0}
+
+def service_account_info() -> dict:
+    """Parsed GOOGLE_CREDS_JSON (private_key newlines restored), parsed once"""
+    global _info
+    if _info is None:
+        creds_json_str = os.getenv("GOOGLE_CREDS_JSON")
+        if not creds_json_str:
+            raise RuntimeError("GOOGLE_CREDS_JSON not set in environment")
+        creds_json = json.loads(creds_json_str)
+        if "private_key" in creds_json:
+            creds_json["private_key"] = creds_json["private_key"].replace("\\n", "\n")
+        _info = creds_json
+    return _info
+
+def get_credentials(scopes: Sequence[str] = SHEETS_SCOPES) -> Credentials:
+    """Shared Credentials for a scope set"""
+    key = tuple(scopes)
+    creds = _credentials.get(key)
+    if creds is None:
+        with _lock:
+            creds = _credentials.get(key)
+            if creds is None:
+                creds = Credentials.from_service_account_info(service_account_info(), scopes=list(key))
+                _locks[key] = threading.Lock()
+                _credentials[key] = creds
+    return creds
+
+def _expiring(creds: Credentials) -> bool:
+    if not creds.token or creds.expiry is None:
+        return True
+    # google-auth menyimpan expiry sebagai UTC naive
+    return creds.expiry - datetime.utcnow() <= REFRESH_MARGIN
+
+def _refresh(key: Tuple[str, ...], force: bool = False) -> None:
+    creds = _credentials[key]
+    with _locks[key]:
+        if force or not creds.valid:
+            creds.refresh(Request(session=http_pool.get_session("oauth")))
+            stats["refreshes"] += 1
+
+def get_token(scopes: Sequence[str] = SHEETS_SCOPES) -> str:
+    """Valid access token; blocks only if no token was fetched yet (or the refresher is behind)"""
+    creds = get_credentials(scopes)
+    if not creds.valid:
+        _refresh(tuple(scopes))
+    return creds.token
+
+def refresh_expiring() -> None:
+    """Refresh every token that expires within REFRESH_MARGIN"""
+    for key, creds in list(_credentials.items()):
+        if not _expiring(creds):
+            continue
+        try:
+            _refresh(key, force=True)
+            stats["background_refreshes"] += 1
+        except Exception as e:
+            stats["refresh_errors"] += 1
+            logging.warning(f"Background token refresh failed for {key}: {e}")
+
+def _run() -> None:
+    while not _stop.wait(CHECK_INTERVAL):
+        refresh_expiring()
+
+def start() -> None:
+    """Fetch the Sheets token now and keep all tokens fresh in a background thread"""
+    global _thread
+    if _thread and _thread.is_alive():
+        return
+    try:
+        get_token(SHEETS_SCOPES)
+    except Exception as e:
+        logging.warning(f"Initial Google token fetch failed: {e}")
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="google-token-refresher", daemon=True)
+    _thread.start()
+
+def stop() -> None:
+    _stop.set()
@@ -0,0 +1,94 @@
+# app/utils/http_pool.py
+import os
+import threading
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ========================
+# HTTP Session Bersama (keep-alive)
+# ========================
+# Semua panggilan sync ke googleapis.com (gspread, helper Drive, probe versi)
+# memakai session dengan pool koneksi keep-alive, jadi koneksi TCP+TLS
+# dipakai ulang antar request. Ukuran pool mengikuti threadpool worker
+# (default AnyIO: 40 thread). Timeout connect dan read dipisah.
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "40"))
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+
+def timeouts(read: float = READ_TIMEOUT) -> tuple:
+    """(connect, read) timeout pair for requests"""
+    return (CONNECT_TIMEOUT, read)
+
+class _Counters:
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def add_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def add_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            requests_sent, opened = self.requests, self.connections
+        return {
+            "requests": requests_sent,
+            "connections_opened": opened,
+            "reuse_ratio": round(1 - opened / requests_sent, 3) if requests_sent else 0.0,
+        }
+
+def _counting_pool(base, counters: _Counters):
+    class CountingPool(base):
+        def _new_conn(self):
+            counters.add_connection()
+            return super()._new_conn()
+    return CountingPool
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with a sized keep-alive pool, default timeouts and connection counters"""
+
+    def __init__(self, counters: _Counters, pool_size: int = POOL_SIZE):
+        self.counters = counters
+        super().__init__(pool_connections=10, pool_maxsize=pool_size)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: _counting_pool(pool_cls, self.counters)
+            for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def send(self, request, timeout=None, **kwargs):
+        self.counters.add_request()
+        return super().send(request, timeout=timeout if timeout is not None else timeouts(), **kwargs)
+
+_counters: Dict[str, _Counters] = {}
+_sessions: Dict[str, requests.Session] = {}
+_lock = threading.Lock()
+
+def mount(session: requests.Session, name: str) -> requests.Session:
+    """Install the pooled adapter on an existing session (e.g. gspread's AuthorizedSession)"""
+    adapter = PooledAdapter(_counters.setdefault(name, _Counters()))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_session(name: str = "google") -> requests.Session:
+    """Shared pooled session for plain (non-gspread) Google calls"""
+    session = _sessions.get(name)
+    if session is None:
+        with _lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = _sessions[name] = mount(requests.Session(), name)
+    return session
+
+def get_stats() -> dict:
+    return {name: counters.snapshot() for name, counters in list(_counters.items())}
@@ -0,0 +1,94 @@
+# app/utils/image_render.py
+import io
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Tuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# ========================
+# Rendisi Foto (decode sekali, beberapa ukuran)
+# ========================
+# JPEG dari kamera HP (12-50 MP) di-decode dengan draft mode: decoder libjpeg
+# langsung menskala 1/2, 1/4 atau 1/8, jadi foto 12 MP tidak pernah dibuka
+# penuh di memori. Orientasi EXIF diterapkan, lalu rendisi dibuat dari yang
+# terbesar ke terkecil dari satu hasil decode. Modul ini sengaja hanya
+# bergantung pada Pillow karena dijalankan di process pool (spawn).
+RENDITIONS: Dict[str, Tuple[int, int]] = {"detail": (800, 600), "thumb": (240, 180)}
+WEBP_QUALITY = 85
+PROCESS_WORKERS = int(os.getenv("PHOTO_PROCESS_WORKERS", "1"))
+RENDER_TIMEOUT = 120
+
+class InvalidImageError(ValueError):
+    """The upload is not an image Pillow can decode"""
+
+def _open(source, box: Tuple[int, int]) -> Image.Image:
+    try:
+        image = Image.open(source)
+        if image.format == "JPEG":
+            # Sisi terpanjang dipakai untuk kedua sumbu: orientasi EXIF bisa menukar lebar/tinggi
+            side = max(box)
+            image.draft("RGB", (side, side))
+        ImageOps.exif_transpose(image, in_place=True)
+    except (UnidentifiedImageError, Image.DecompressionBombError, SyntaxError) as e:
+        raise InvalidImageError(str(e)) from e
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return image
+
+def render_renditions(source, renditions: Dict[str, Tuple[int, int]] = RENDITIONS,
+                      quality: int = WEBP_QUALITY) -> Dict[str, bytes]:
+    """WebP bytes for every rendition (name -> bytes); source is a path or file object"""
+    ordered = sorted(renditions.items(), key=lambda item: item[1][0] * item[1][1], reverse=True)
+    image = _open(source, ordered[0][1])
+    result = {}
+    for name, size in ordered:
+        # Tiap rendisi diperkecil dari rendisi sebelumnya, bukan dari aslinya
+        image.thumbnail(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        output = io.BytesIO()
+        image.save(output, format="WEBP", quality=quality, method=4)
+        result[name] = output.getvalue()
+    return result
+
+# ========================
+# Process Pool
+# ========================
+# Resize/encode memegang GIL cukup lama; di process terpisah thread request
+# tetap jalan. Child dibuat dengan spawn (aman dengan thread yang sudah ada).
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def render_in_pool(path: str, renditions: Dict[str, Tuple[int, int]] = RENDITIONS) -> Dict[str, bytes]:
+    """render_renditions(path) in the process pool (inline when PHOTO_PROCESS_WORKERS=0)"""
+    if PROCESS_WORKERS <= 0:
+        return render_renditions(path, renditions)
+    global _pool
+    pool = _get_pool()
+    try:
+        return pool.submit(render_renditions, path, renditions).result(timeout=RENDER_TIMEOUT)
+    except BrokenProcessPool:
+        # Child mati (mis. OOM); pool baru dibuat pada panggilan berikutnya
+        logging.warning("Image render process pool broke, recreating it")
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        raise
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -1,5 +1,5 @@
 # app/utils/models.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, Index, Float, LargeBinary
 from sqlalchemy.sql import func
 from app.database.database import Base
 import hashlib
@@ -33,6 +33,79 @@ class User(Base):
     def __repr__(self):
         return f"<User(username='{self.username}', role='{self.role}')>"
 
+class AssetRecord(Base):
+    """Read model of one row of the Assets worksheet (Sheets stays the system of record)"""
+    __tablename__ = "assets"
+
+    id = Column(Integer, primary_key=True)
+    row_number = Column(Integer, index=True, nullable=False)
+    asset_id = Column(String(50), index=True, nullable=True)
+    asset_tag = Column(String(100), index=True, nullable=True)
+    status_key = Column(String(50), index=True, nullable=True)
+    location = Column(String(255), nullable=True)
+    room_location = Column(String(255), nullable=True)
+    data = Column(JSON, nullable=False)
+    synced_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_assets_status_row", "status_key", "row_number"),
+    )
+
+    def __repr__(self):
+        return f"<AssetRecord(asset_id='{self.asset_id}', row={self.row_number})>"
+
+class DataSnapshot(Base):
+    """Last good full read of one dataset (Assets, Ref_* tables), zlib-compressed JSON"""
+    __tablename__ = "data_snapshots"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(String(20), nullable=False)
+    saved_at = Column(Float, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+
+    def __repr__(self):
+        return f"<DataSnapshot(name='{self.name}', version='{self.version}')>"
+
+class PhotoJob(Base):
+    """Background photo job (resize, Drive upload, Photo URL write); the raw upload is in photo_job_chunks"""
+    __tablename__ = "photo_jobs"
+
+    id = Column(String(32), primary_key=True)
+    asset_id = Column(String(50), index=True, nullable=False)
+    filename = Column(String(255), nullable=False)
+    status = Column(String(20), index=True, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    image_url = Column(String(500), nullable=True)
+    created_at = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<PhotoJob(id='{self.id}', asset_id='{self.asset_id}', status='{self.status}')>"
+
+class PhotoJobChunk(Base):
+    """Fixed-size piece of a photo job's raw upload, kept until the job is done"""
+    __tablename__ = "photo_job_chunks"
+
+    job_id = Column(String(32), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+
+    def __repr__(self):
+        return f"<PhotoJobChunk(job_id='{self.job_id}', seq={self.seq})>"
+
+class AssetTagSequence(Base):
+    """Last Asset Tag sequence number handed out per (code company, code type, year), and the last asset ID"""
+    __tablename__ = "asset_tag_sequences"
+
+    code_company = Column(String(50), primary_key=True)
+    code_type = Column(String(10), primary_key=True)
+    year = Column(String(4), primary_key=True)
+    last_value = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<AssetTagSequence({self.code_company}, {self.code_type}, {self.year}: {self.last_value})>"
+
 # Pydantic Models for API
 class UserCreate(BaseModel):
     username: str
@@ -1,50 +1,41 @@
 import io
 import os
-import json
+import time
 import logging
 import requests
-from PIL import Image
-from google.oauth2.service_account import Credentials
-from google.auth.transport.requests import Request
+from app.utils import google_auth, http_pool, image_render
 
 # Constants
-DRIVE_SCOPE = ['https://www.googleapis.com/auth/drive.file']
-MAX_IMAGE_SIZE = (800, 600)
-WEBP_QUALITY = 85
+DRIVE_SCOPE = google_auth.DRIVE_SCOPES
+MAX_IMAGE_SIZE = image_render.RENDITIONS["detail"]
+WEBP_QUALITY = image_render.WEBP_QUALITY
+UPLOAD_CHUNK_SIZE = 4 * 256 * 1024  # Drive: kelipatan 256 KB kecuali chunk terakhir
+MAX_UPLOAD_RETRIES = 5
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+def _session():
+    """Keep-alive session shared by all Drive calls (initiate, upload, permission, delete)"""
+    return http_pool.get_session("drive")
 
 def get_access_token():
-    """Get Google Drive access token"""
+    """Get Google Drive access token (shared credentials, refreshed ahead of expiry)"""
     try:
-        creds_json = json.loads(os.getenv("GOOGLE_CREDS_JSON", "{}"))
-        if "private_key" in creds_json:
-            creds_json["private_key"] = creds_json["private_key"].replace("\\n", "\n")
-
-        credentials = Credentials.from_service_account_info(creds_json, scopes=DRIVE_SCOPE)
-        credentials.refresh(Request())
-        return credentials.token
+        return google_auth.get_token(DRIVE_SCOPE)
     except Exception as e:
         logging.error(f"Token error: {e}")
         return None
 
 def resize_and_convert_image(image_file, max_size=MAX_IMAGE_SIZE, quality=WEBP_QUALITY):
-    """Resize image and convert to WebP"""
+    """Resize image and convert to WebP (single rendition, in-process)"""
     try:
-        image = Image.open(image_file)
-        if image.mode in ('RGBA', 'LA', 'P'):
-            image = image.convert('RGB')
-
-        image.thumbnail(max_size, Image.Resampling.LANCZOS)
-
-        output = io.BytesIO()
-        image.save(output, format='WEBP', quality=quality, optimize=True)
-        output.seek(0)
-        return output
+        renditions = image_render.render_renditions(image_file, {"detail": max_size}, quality)
+        return io.BytesIO(renditions["detail"])
     except Exception as e:
         logging.error(f"Image processing error: {e}")
         return None
 
 def upload_to_drive(image_data, filename, asset_id):
-    """Upload image to Google Drive Shared Drive using resumable upload"""
+    """Upload image (any seekable file object) to Google Drive Shared Drive using resumable upload"""
     try:
         access_token = get_access_token()
         if not access_token:
@@ -56,46 +47,59 @@ def upload_to_drive(image_data, filename, asset_id):
             logging.error("Missing DRIVE_FOLDER_ID or DRIVE_SHARED_ID in environment")
             return None
 
+        image_data.seek(0, os.SEEK_END)
+        size = image_data.tell()
+
         # Step 1: Initiate upload session
-        upload_url = _initiate_upload(access_token, filename, asset_id, image_data, folder_id, shared_drive_id)
+        upload_url = _initiate_upload(access_token, filename, asset_id, size, folder_id, shared_drive_id)
         if not upload_url:
             return None
 
         # Step 2: Upload file data
-        file_id = _upload_file_data(upload_url, image_data)
+        file_id = _upload_file_data(upload_url, image_data, size)
         if not file_id:
             return None
 
-        # Step 3: Set public permissions
-        _set_public_permission(access_token, file_id)
-
-        # Return preview link
-        return f"https://drive.google.com/thumbnail?id={file_id}&sz=w400-h300"
+        # File tetap privat; foto disajikan lewat proxy /photos (photo_cache)
+        return _preview_url(file_id)
 
     except Exception as e:
         logging.error(f"Upload error: {e}")
         return None
 
-def _initiate_upload(access_token, filename, asset_id, image_data, folder_id, shared_drive_id):
-    """Initiate resumable upload session"""
-    file_metadata = {
+def _file_metadata(filename, asset_id, folder_id, shared_drive_id):
+    return {
         'name': f"AMBP_{asset_id}_{filename}.webp",
         'parents': [folder_id],
         'driveId': shared_drive_id
     }
 
+def _preview_url(file_id):
+    return f"https://drive.google.com/thumbnail?id={file_id}&sz=w400-h300"
+
+def drive_file_id(image_url):
+    """Drive file ID from a stored Photo URL (…?id=<file_id>&…), or None"""
+    if not image_url or 'id=' not in image_url:
+        return None
+    file_id = image_url.split('id=')[1].split('&')[0]
+    return file_id if file_id and file_id.replace('-', '').replace('_', '').isalnum() else None
+
+def _initiate_upload(access_token, filename, asset_id, size, folder_id, shared_drive_id):
+    """Initiate resumable upload session"""
+    file_metadata = _file_metadata(filename, asset_id, folder_id, shared_drive_id)
+
     headers = {
         'Authorization': f'Bearer {access_token}',
         'Content-Type': 'application/json',
         'X-Upload-Content-Type': 'image/webp',
-        'X-Upload-Content-Length': str(len(image_data.getvalue()))
+        'X-Upload-Content-Length': str(size)
     }
 
-    response = requests.post(
+    response = _session().post(
         'https://www.googleapis.com/upload/drive/v3/files?uploadType=resumable&supportsAllDrives=true',
         headers=headers,
         json=file_metadata,
-        timeout=30
+        timeout=http_pool.timeouts(30)
     )
 
     if response.status_code == 200:
@@ -104,41 +108,56 @@ def _initiate_upload(access_token, filename, asset_id, image_data, folder_id, sh
         logging.error(f"Failed to initiate upload: {response.status_code} - {response.text}")
         return None
 
-def _upload_file_data(upload_url, image_data):
-    """Upload file data to resumable URL"""
-    image_data.seek(0)
-    headers = {
-        'Content-Type': 'image/webp',
-        'Content-Length': str(len(image_data.getvalue()))
-    }
-
-    response = requests.put(
-        upload_url,
-        headers=headers,
-        data=image_data.getvalue(),
-        timeout=60
-    )
-
-    if response.status_code in [200, 201]:
-        return response.json().get('id')
-    else:
-        logging.error(f"Upload failed: {response.status_code} - {response.text}")
-        return None
-
-def _set_public_permission(access_token, file_id):
-    """Set file to public readable"""
-    try:
-        requests.post(
-            f"https://www.googleapis.com/drive/v3/files/{file_id}/permissions?supportsAllDrives=true",
-            headers={
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            },
-            json={'role': 'reader', 'type': 'anyone'},
-            timeout=30
-        )
-    except Exception as e:
-        logging.error(f"Permission error: {e}")
+def _committed_offset(response):
+    """Next byte Drive expects, from the Range header of a 308 response ('bytes=0-N')"""
+    committed = response.headers.get('Range')
+    return int(committed.rsplit('-', 1)[1]) + 1 if committed else 0
+
+def _upload_file_data(upload_url, image_data, size):
+    """Upload file data to resumable URL in fixed-size chunks, resuming after a failure"""
+    offset = 0
+    failures = 0
+    query_status = False
+    while True:
+        if query_status or offset >= size:
+            # Tanyakan ke Drive berapa byte yang sudah diterima
+            chunk = b''
+            headers = {'Content-Length': '0', 'Content-Range': f'bytes */{size}'}
+        else:
+            image_data.seek(offset)
+            chunk = image_data.read(UPLOAD_CHUNK_SIZE)
+            headers = {
+                'Content-Type': 'image/webp',
+                'Content-Length': str(len(chunk)),
+                'Content-Range': f'bytes {offset}-{offset + len(chunk) - 1}/{size}'
+            }
+
+        try:
+            response = _session().put(upload_url, headers=headers, data=chunk, timeout=http_pool.timeouts(60))
+        except requests.RequestException as e:
+            error = str(e)
+        else:
+            if response.status_code in [200, 201]:
+                return response.json().get('id')
+            if response.status_code == 308:
+                committed = _committed_offset(response)
+                if committed > offset:
+                    failures = 0
+                offset, query_status = committed, False
+                continue
+            if response.status_code not in RETRYABLE_STATUS:
+                logging.error(f"Upload failed: {response.status_code} - {response.text}")
+                return None
+            error = f"{response.status_code} - {response.text}"
+
+        failures += 1
+        if failures > MAX_UPLOAD_RETRIES:
+            logging.error(f"Upload failed after {MAX_UPLOAD_RETRIES} retries: {error}")
+            return None
+        delay = min(30, 2 ** failures)
+        logging.warning(f"Upload chunk at byte {offset} failed, resuming in {delay}s: {error}")
+        time.sleep(delay)
+        query_status = True
 
 def delete_from_drive(image_url):
     """Delete image from Google Drive"""
@@ -146,7 +165,7 @@ def delete_from_drive(image_url):
         if not image_url or 'drive.google.com' not in image_url:
             return False
 
-        file_id = image_url.split('id=')[1] if 'id=' in image_url else None
+        file_id = drive_file_id(image_url)
         if not file_id:
             return False
 
@@ -154,10 +173,10 @@ def delete_from_drive(image_url):
         if not access_token:
             return False
 
-        response = requests.delete(
+        response = _session().delete(
             f"https://www.googleapis.com/drive/v3/files/{file_id}?supportsAllDrives=true",
             headers={'Authorization': f'Bearer {access_token}'},
-            timeout=30
+            timeout=http_pool.timeouts(30)
         )
 
         return response.status_code == 204
@@ -0,0 +1,162 @@
+# app/utils/photo_cache.py
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.utils import google_auth, http_pool, image_render
+from app.utils.cache import SingleFlight
+
+# ========================
+# Cache Disk Foto (proxy /photos)
+# ========================
+# Foto asset disajikan aplikasi sendiri, bukan link thumbnail Drive publik.
+# File Drive diunduh sekali dengan service account, semua rendisi dibuat dari
+# satu decode dan disimpan di disk dengan batas ukuran (LRU, urutan dari
+# mtime sehingga tetap berlaku setelah restart). ID file Drive berganti setiap
+# foto baru, jadi isi satu (file_id, ukuran) tidak pernah berubah.
+CACHE_DIR = os.getenv("PHOTO_CACHE_DIR", os.path.join("data", "photo_cache"))
+MAX_BYTES = int(os.getenv("PHOTO_CACHE_MAX_MB", "200")) * 1024 * 1024
+DRIVE_MEDIA_URL = "https://www.googleapis.com/drive/v3/files/{file_id}"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+def _etag(content: bytes) -> str:
+    return '"' + hashlib.sha256(content).hexdigest()[:32] + '"'
+
+class PhotoCache:
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # nama file -> ukuran, urutan LRU
+        self._total = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.stats = {"hits": 0, "misses": 0, "fetches": 0, "fetch_errors": 0, "evictions": 0}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, name)
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU order from files already on disk (oldest mtime first)"""
+        if self._loaded:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".webp"):
+                stat = os.stat(self._path(name))
+                files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total += size
+        self._loaded = True
+
+    def _read(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            self._load_index()
+            if name not in self._entries:
+                return None
+            self._entries.move_to_end(name)
+        try:
+            with open(self._path(name), "rb") as f:
+                content = f.read()
+            os.utime(self._path(name))
+            return content
+        except FileNotFoundError:
+            with self._lock:
+                self._total -= self._entries.pop(name, 0)
+            return None
+
+    def get(self, file_id: str, size: str) -> Optional[Tuple[bytes, str]]:
+        """(webp bytes, strong ETag) of one rendition; fetched from Drive on a miss. None if unavailable"""
+        name = f"{file_id}.{size}.webp"
+        content = self._read(name)
+        if content is not None:
+            self.stats["hits"] += 1
+        else:
+            self.stats["misses"] += 1
+            self._flight.do(file_id, lambda: self._fetch(file_id))
+            content = self._read(name)
+            if content is None:
+                return None
+        return content, _etag(content)
+
+    def store(self, file_id: str, renditions: Dict[str, bytes]) -> None:
+        """Add freshly rendered renditions (name -> webp bytes) and evict beyond the size limit"""
+        with self._lock:
+            self._load_index()
+        for size, content in renditions.items():
+            name = f"{file_id}.{size}.webp"
+            tmp_path = self._path(name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, self._path(name))
+            with self._lock:
+                self._total += len(content) - self._entries.pop(name, 0)
+                self._entries[name] = len(content)
+        self._evict()
+
+    def _evict(self) -> None:
+        while True:
+            with self._lock:
+                if self._total <= self.max_bytes or not self._entries:
+                    return
+                name, size = self._entries.popitem(last=False)
+                self._total -= size
+            self.stats["evictions"] += 1
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+
+    def _fetch(self, file_id: str) -> None:
+        """Download the Drive file once (streamed to a temp file) and render every size"""
+        self.stats["fetches"] += 1
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".download")
+        try:
+            # Scope Sheets memuat drive penuh, jadi foto lama dari klien lain juga terbaca
+            response = http_pool.get_session("drive").get(
+                DRIVE_MEDIA_URL.format(file_id=file_id),
+                params={"alt": "media", "supportsAllDrives": "true"},
+                headers={"Authorization": f"Bearer {google_auth.get_token(google_auth.SHEETS_SCOPES)}"},
+                timeout=http_pool.timeouts(60),
+                stream=True,
+            )
+            with response:
+                if response.status_code == 404:
+                    return
+                response.raise_for_status()
+                with os.fdopen(fd, "wb") as f:
+                    fd = None
+                    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+            self.store(file_id, image_render.render_in_pool(tmp_path))
+        except image_render.InvalidImageError as e:
+            logging.warning(f"Drive file {file_id} is not a readable image: {e}")
+        except Exception:
+            self.stats["fetch_errors"] += 1
+            raise
+        finally:
+            if fd is not None:
+                os.close(fd)
+            os.remove(tmp_path)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            files, total = len(self._entries), self._total
+        return {"files": files, "bytes": total, "max_bytes": self.max_bytes, **self.stats}
+
+_photo_cache = PhotoCache()
+
+def get(file_id: str, size: str) -> Optional[Tuple[bytes, str]]:
+    return _photo_cache.get(file_id, size)
+
+def store(file_id: str, renditions: Dict[str, bytes]) -> None:
+    _photo_cache.store(file_id, renditions)
+
+def get_stats() -> dict:
+    return _photo_cache.snapshot()
@@ -0,0 +1,295 @@
+# app/utils/photo_jobs.py
+import io
+import os
+import time
+import uuid
+import queue
+import logging
+import tempfile
+import threading
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+
+from app.database.database import SessionLocal
+from app.utils import image_render, photo_cache
+from app.utils.models import PhotoJob, PhotoJobChunk
+
+# ========================
+# Antrian Job Foto (resize + upload Drive di background)
+# ========================
+# Request upload hanya menyimpan job ke tabel photo_jobs (PostgreSQL) dan
+# byte mentahnya, per potongan SPOOL_CHUNK_SIZE, ke photo_job_chunks, lalu
+# langsung kembali. Worker pool kecil memproses job: potongan disalin satu
+# per satu ke file sementara, resize/WebP, upload ke Drive, tulis Photo URL
+# ke sheet. Memori per upload paling besar satu potongan, dan job tidak
+# hilang bersama disk instance saat spin-down: job yang belum selesai
+# dilanjutkan setelah restart. Potongan dihapus begitu job selesai.
+WORKERS = int(os.getenv("PHOTO_WORKERS", "2"))
+MAX_ATTEMPTS = int(os.getenv("PHOTO_MAX_ATTEMPTS", "5"))
+MAX_PHOTO_BYTES = int(os.getenv("PHOTO_MAX_MB", "30")) * 1024 * 1024
+KEEP_FINISHED_SECONDS = 24 * 3600
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+QUEUED, PROCESSING, DONE, FAILED = "queued", "processing", "done", "failed"
+
+_JOB_COLUMNS = (PhotoJob.id, PhotoJob.asset_id, PhotoJob.filename, PhotoJob.status, PhotoJob.attempts,
+                PhotoJob.error, PhotoJob.image_url, PhotoJob.created_at, PhotoJob.updated_at)
+
+class PermanentJobError(Exception):
+    """Retrying will not help (e.g. the file is not a readable image)"""
+
+class PhotoJobQueue:
+    def __init__(self, workers: int = WORKERS, max_attempts: int = MAX_ATTEMPTS):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._queue = queue.Queue()
+        self._threads = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    # --- penyimpanan job
+    def _select(self, query) -> List[dict]:
+        db = SessionLocal()
+        try:
+            return [dict(row._mapping) for row in db.execute(query)]
+        finally:
+            db.close()
+
+    def _execute(self, statement):
+        db = SessionLocal()
+        try:
+            result = db.execute(statement)
+            # UPDATE .. RETURNING lewat Session memberi result ORM tanpa returns_rows
+            rows = [dict(row._mapping) for row in result] if getattr(result, "returns_rows", True) else []
+            db.commit()
+            return rows
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _save(self, job: dict) -> None:
+        job["updated_at"] = time.time()
+        self._execute(update(PhotoJob).where(PhotoJob.id == job["id"]).values(
+            status=job["status"], attempts=job["attempts"], error=job["error"],
+            image_url=job["image_url"], updated_at=job["updated_at"],
+        ))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        if not job_id.replace("-", "").isalnum():
+            return None
+        jobs = self._select(select(*_JOB_COLUMNS).where(PhotoJob.id == job_id))
+        return jobs[0] if jobs else None
+
+    def pending_for(self, asset_id: str) -> List[dict]:
+        """Unfinished (or just failed) jobs of one asset, newest first (asset_id index)"""
+        return self._select(
+            select(*_JOB_COLUMNS)
+            .where(PhotoJob.asset_id == str(asset_id), PhotoJob.status != DONE)
+            .order_by(PhotoJob.created_at.desc())
+        )
+
+    # --- API
+    def submit(self, asset_id: str, filename: str, source) -> dict:
+        """Store the raw upload (file object, one chunk at a time) and queue it; returns the job record"""
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "asset_id": str(asset_id),
+            "filename": filename or "photo",
+            "status": QUEUED,
+            "attempts": 0,
+            "error": None,
+            "image_url": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self.start()
+        db = SessionLocal()
+        try:
+            size, seq = 0, 0
+            while True:
+                chunk = source.read(SPOOL_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_PHOTO_BYTES:
+                    raise ValueError(f"Photo is larger than {MAX_PHOTO_BYTES // (1024 * 1024)} MB")
+                db.execute(insert(PhotoJobChunk).values(job_id=job["id"], seq=seq, data=chunk))
+                seq += 1
+            db.execute(insert(PhotoJob).values(**job))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        self._queue.put(job["id"])
+        return job
+
+    def start(self) -> None:
+        with self._lock:
+            if any(t.is_alive() for t in self._threads):
+                return
+            self._stop.clear()
+            try:
+                self._recover()
+            except Exception as e:
+                logging.warning(f"Could not recover photo jobs: {e}")
+            self._threads = [
+                threading.Thread(target=self._run, name=f"photo-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        """Let running jobs finish; queued jobs stay in the database for the next start"""
+        self._stop.set()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _recover(self) -> None:
+        """Re-queue jobs left unfinished by a previous process; drop old finished ones"""
+        now = time.time()
+        recovered = self._execute(
+            update(PhotoJob)
+            .where(PhotoJob.status.in_((QUEUED, PROCESSING)))
+            .values(status=QUEUED, updated_at=now)
+            .returning(PhotoJob.id)
+        )
+        for job in recovered:
+            self._queue.put(job["id"])
+        expired = select(PhotoJob.id).where(
+            PhotoJob.status.in_((DONE, FAILED)), PhotoJob.updated_at < now - KEEP_FINISHED_SECONDS,
+        )
+        self._execute(delete(PhotoJobChunk).where(PhotoJobChunk.job_id.in_(expired)))
+        self._execute(delete(PhotoJob).where(PhotoJob.id.in_(expired)))
+
+    # --- worker
+    def _run(self) -> None:
+        from app.utils.quota import background_priority  # avoid circular import
+        with background_priority():
+            while not self._stop.is_set():
+                job_id = self._queue.get()
+                if job_id is None:
+                    return
+                self._process(job_id)
+
+    def _claim(self, job_id: str) -> Optional[dict]:
+        """Atomically move a queued job to processing (safe with several workers or processes)"""
+        jobs = self._execute(
+            update(PhotoJob)
+            .where(PhotoJob.id == job_id, PhotoJob.status == QUEUED)
+            .values(status=PROCESSING, attempts=PhotoJob.attempts + 1, updated_at=time.time())
+            .returning(*_JOB_COLUMNS)
+        )
+        return jobs[0] if jobs else None
+
+    def _process(self, job_id: str) -> None:
+        job = self._claim(job_id)
+        if not job:
+            return
+        try:
+            self._handle(job)
+            job["status"], job["error"] = DONE, None
+            self._save(job)
+            self._execute(delete(PhotoJobChunk).where(PhotoJobChunk.job_id == job_id))
+        except Exception as e:
+            job["error"] = str(e)
+            if isinstance(e, PermanentJobError) or job["attempts"] >= self.max_attempts:
+                job["status"] = FAILED
+                logging.error(f"Photo job {job_id} for asset {job['asset_id']} failed: {e}")
+                self._save(job)
+                return
+            job["status"] = QUEUED
+            self._save(job)
+            delay = min(300, 5 * 2 ** (job["attempts"] - 1))
+            logging.warning(f"Photo job {job_id} attempt {job['attempts']} failed, retrying in {delay}s: {e}")
+            timer = threading.Timer(delay, self._queue.put, args=(job_id,))
+            timer.daemon = True
+            timer.start()
+
+    def _handle(self, job: dict) -> None:
+        from app.utils import sheets  # avoid circular import
+        from app.utils.photo import upload_to_drive, drive_file_id
+
+        # Upload yang sudah berhasil tidak diulang saat retry penulisan sheet
+        if not job["image_url"]:
+            renditions = self._render(job["id"])
+
+            image_url = upload_to_drive(io.BytesIO(renditions["detail"]), job["filename"], job["asset_id"])
+            if not image_url:
+                raise RuntimeError("Error uploading image")
+            job["image_url"] = image_url
+            self._save(job)
+            # Rendisi yang sudah jadi langsung masuk cache proxy foto
+            try:
+                photo_cache.store(drive_file_id(image_url), renditions)
+            except OSError as e:
+                logging.warning(f"Could not cache renditions of {image_url}: {e}")
+
+        # Photo URL column is added if missing
+        found = sheets.read_asset_row(job["asset_id"])
+        if not found:
+            raise PermanentJobError(f"Asset {job['asset_id']} not found")
+        row_number, _ = found
+        sheets.update_asset_fields(row_number, {"Photo URL": job["image_url"]})
+
+    def _render(self, job_id: str) -> dict:
+        """Renditions of the stored upload; the process pool reads it from a temp file"""
+        fd, path = tempfile.mkstemp(suffix=".upload")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if not self._copy_chunks(job_id, f):
+                    raise PermanentJobError("Uploaded photo is no longer stored")
+            return image_render.render_in_pool(path)
+        except image_render.InvalidImageError as e:
+            raise PermanentJobError(f"Error processing image: {e}")
+        finally:
+            os.remove(path)
+
+    def _copy_chunks(self, job_id: str, target) -> int:
+        """Write the stored upload to target chunk by chunk (server-side cursor); returns the chunk count"""
+        query = (select(PhotoJobChunk.data).where(PhotoJobChunk.job_id == job_id)
+                 .order_by(PhotoJobChunk.seq).execution_options(yield_per=1))
+        db = SessionLocal()
+        try:
+            count = 0
+            for (data,) in db.execute(query):
+                target.write(data)
+                count += 1
+            return count
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        counts = {QUEUED: 0, PROCESSING: 0, DONE: 0, FAILED: 0}
+        for row in self._select(select(PhotoJob.status, func.count().label("count")).group_by(PhotoJob.status)):
+            counts[row["status"]] = row["count"]
+        return {"workers": self.workers, **counts}
+
+_photo_jobs = PhotoJobQueue()
+
+def submit(asset_id: str, filename: str, source) -> dict:
+    return _photo_jobs.submit(asset_id, filename, source)
+
+def get(job_id: str) -> Optional[dict]:
+    return _photo_jobs.get(job_id)
+
+def pending_for(asset_id: str) -> List[dict]:
+    return _photo_jobs.pending_for(asset_id)
+
+def start() -> None:
+    _photo_jobs.start()
+
+def shutdown(timeout: float = 10) -> None:
+    _photo_jobs.stop(timeout)
+    image_render.shutdown()
+
+def get_stats() -> dict:
+    return _photo_jobs.stats()
@@ -0,0 +1,181 @@
+# app/utils/quota.py
+import os
+import time
+import asyncio
+import random
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from google.auth.transport.requests import AuthorizedSession
+
+# ========================
+# Penjadwal Kuota Google Sheets
+# ========================
+# Sheets API membatasi request baca dan tulis per menit secara terpisah.
+# Semua request gspread lewat ScheduledSession: setiap request mengambil token
+# dari bucket "read" atau "write". Request background (sync, log audit) hanya
+# boleh memakai token di atas cadangan untuk request interaktif. Respon 429
+# menghentikan bucket sesuai Retry-After lalu request diulang. Client async
+# (google_async) memakai bucket yang sama lewat request_async.
+READ_PER_MINUTE = int(os.getenv("SHEETS_READ_QUOTA_PER_MIN", "60"))
+WRITE_PER_MINUTE = int(os.getenv("SHEETS_WRITE_QUOTA_PER_MIN", "60"))
+INTERACTIVE_RESERVE = float(os.getenv("SHEETS_INTERACTIVE_RESERVE", "0.2"))
+MAX_WAIT = 30
+MAX_429_RETRIES = 4
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+_priority: ContextVar = ContextVar("sheets_priority", default=INTERACTIVE)
+
+class TokenBucket:
+    def __init__(self, name: str, per_minute: int, reserve_ratio: float = INTERACTIVE_RESERVE):
+        self.name = name
+        self.capacity = float(max(1, per_minute))
+        self.rate = self.capacity / 60.0
+        self.reserve = self.capacity * reserve_ratio
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"granted": 0, "waited": 0, "wait_seconds": 0.0, "throttled_429": 0}
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority: str = INTERACTIVE, max_wait: float = MAX_WAIT) -> float:
+        """Take one token, sleeping until one is available; returns seconds waited"""
+        started = time.monotonic()
+        while True:
+            granted, value = self._take(priority, started, max_wait)
+            if granted:
+                return value
+            time.sleep(value)
+
+    async def acquire_async(self, priority: str = INTERACTIVE, max_wait: float = MAX_WAIT) -> float:
+        """Same as acquire() but yields to the event loop while waiting"""
+        started = time.monotonic()
+        while True:
+            granted, value = self._take(priority, started, max_wait)
+            if granted:
+                return value
+            await asyncio.sleep(value)
+
+    def _take(self, priority: str, started: float, max_wait: float):
+        """One attempt: (True, seconds waited) if a token was taken, else (False, seconds to sleep)"""
+        floor = 1.0 if priority == INTERACTIVE else 1.0 + self.reserve
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now >= self._blocked_until and self._tokens >= floor:
+                self._tokens -= 1
+                waited = now - started
+                self.stats["granted"] += 1
+                if waited > 0.001:
+                    self.stats["waited"] += 1
+                    self.stats["wait_seconds"] += waited
+                return True, waited
+            delay = max(self._blocked_until - now, (floor - self._tokens) / self.rate)
+            elapsed = now - started
+            if elapsed >= max_wait:
+                logging.warning(f"Sheets {self.name} budget exhausted for {max_wait}s, sending {priority} request anyway")
+                self.stats["granted"] += 1
+                return True, elapsed
+        return False, min(delay, 1.0, max_wait - elapsed)
+
+    def penalize(self, retry_after: float) -> None:
+        """Server said 429: stop issuing requests from this bucket for a while"""
+        with self._lock:
+            self._tokens = 0.0
+            self._updated = time.monotonic()
+            self._blocked_until = max(self._blocked_until, self._updated + retry_after)
+            self.stats["throttled_429"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "capacity_per_minute": int(self.capacity),
+                "available": round(self._tokens, 2),
+                "used_ratio": round(1 - self._tokens / self.capacity, 3),
+                "interactive_reserve": round(self.reserve, 2),
+                "blocked_for_seconds": round(max(0.0, self._blocked_until - now), 2),
+                **{k: round(v, 3) if isinstance(v, float) else v for k, v in self.stats.items()},
+            }
+
+_buckets = {
+    "read": TokenBucket("read", READ_PER_MINUTE),
+    "write": TokenBucket("write", WRITE_PER_MINUTE),
+}
+
+def _retry_after_seconds(response, attempt: int) -> float:
+    value = response.headers.get("Retry-After")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    # Tanpa Retry-After: backoff eksponensial dengan jitter
+    return min(MAX_WAIT, 2 ** attempt + random.random())
+
+def classify(method: str, url: str) -> Optional[str]:
+    """Which budget a request draws from, or None for non-Sheets calls"""
+    if "sheets.googleapis.com" not in url:
+        return None
+    if method.upper() == "GET" or url.split("?")[0].endswith(":batchGetByDataFilter"):
+        return "read"
+    return "write"
+
+class ScheduledSession(AuthorizedSession):
+    """AuthorizedSession that spends Sheets quota tokens and honours 429 Retry-After"""
+
+    def request(self, method, url, *args, **kwargs):
+        kind = classify(method, url)
+        if kind is None:
+            return super().request(method, url, *args, **kwargs)
+        bucket = _buckets[kind]
+        for attempt in range(MAX_429_RETRIES + 1):
+            bucket.acquire(_priority.get())
+            response = super().request(method, url, *args, **kwargs)
+            if response.status_code != 429 or attempt == MAX_429_RETRIES:
+                return response
+            retry_after = _retry_after_seconds(response, attempt)
+            logging.warning(f"Sheets {kind} quota hit (429), pausing {retry_after:.1f}s ({attempt + 1}/{MAX_429_RETRIES})")
+            bucket.penalize(retry_after)
+        return response
+
+async def request_async(client, method: str, url: str, **kwargs):
+    """ScheduledSession.request for an async HTTP client (httpx.AsyncClient)"""
+    kind = classify(method, url)
+    if kind is None:
+        return await client.request(method, url, **kwargs)
+    bucket = _buckets[kind]
+    for attempt in range(MAX_429_RETRIES + 1):
+        await bucket.acquire_async(_priority.get())
+        response = await client.request(method, url, **kwargs)
+        if response.status_code != 429 or attempt == MAX_429_RETRIES:
+            return response
+        retry_after = _retry_after_seconds(response, attempt)
+        logging.warning(f"Sheets {kind} quota hit (429), pausing {retry_after:.1f}s ({attempt + 1}/{MAX_429_RETRIES})")
+        bucket.penalize(retry_after)
+    return response
+
+@contextmanager
+def background_priority():
+    """Mark Sheets calls inside the block as background work"""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def get_stats() -> dict:
+    return {name: bucket.snapshot() for name, bucket in _buckets.items()}
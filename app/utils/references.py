@@ -1,7 +1,107 @@
 # app/utils/references.py
+import time
+import threading
 import gspread
+from collections import defaultdict
 from typing import Dict, Optional, Tuple
 
+# ========================
+# Indeks Referensi (cek keberadaan O(1))
+# ========================
+# Indeks dibangun dari tabel Ref_* yang sudah di-cache oleh sheets (satu
+# batchGet), bukan get_all_records per sheet. Entri baru langsung masuk
+# indeks lalu di-append ke sheet (ikut write_batch() bila aktif); kalau
+# append gagal atau batch dibatalkan, entri itu dibuang lagi. Baris
+# lokal yang belum terlihat di pembacaan sheet berikutnya dipertahankan
+# selama LOCAL_ROW_GRACE detik agar tidak di-append dua kali.
+REFERENCE_HEADERS = {
+    "Ref_Types": ["Type", "Category", "Code Type"],
+    "Ref_Location": ["Location", "Room"],
+    "Ref_Companies": ["Company", "Code Company"],
+    "Ref_Owners": ["Owner", "Code Owner"],
+}
+LOCAL_ROW_GRACE = 600
+
+def _text(value) -> str:
+    return "" if value is None else str(value)
+
+class ReferenceIndex:
+    def __init__(self):
+        self.categories = set()
+        self.types = set()                     # (type, category)
+        self.types_per_category = defaultdict(int)
+        self.locations = set()                 # (location, room)
+        self.companies = set()
+        self.owners = set()
+        self.owner_rows = 0
+
+    @classmethod
+    def from_tables(cls, tables: dict) -> "ReferenceIndex":
+        index = cls()
+        for name, values in tables.items():
+            if not values:
+                continue
+            headers = values[0]
+            for row in values[1:]:
+                index.add(name, dict(zip(headers, row)))
+        return index
+
+    def add(self, sheet_name: str, row: dict) -> None:
+        if sheet_name == "Ref_Categories":
+            self.categories.add(_text(row.get("Category")))
+        elif sheet_name == "Ref_Types":
+            key = (_text(row.get("Type")), _text(row.get("Category")))
+            if key not in self.types:
+                self.types.add(key)
+                self.types_per_category[key[1]] += 1
+        elif sheet_name == "Ref_Location":
+            self.locations.add((_text(row.get("Location")), _text(row.get("Room"))))
+        elif sheet_name == "Ref_Companies":
+            self.companies.add(_text(row.get("Company")))
+        elif sheet_name == "Ref_Owners":
+            self.owners.add(_text(row.get("Owner")))
+            self.owner_rows += 1
+
+_index: Optional[ReferenceIndex] = None
+_index_source = None
+_local_rows = []  # (added_at, sheet_name, row dict)
+_lock = threading.RLock()  # rollback append langsung bisa terjadi di dalam add_*
+
+def _current_index() -> ReferenceIndex:
+    """Index for the cached reference tables; rebuilt when sheets loads a new copy. Call with _lock held"""
+    global _index, _index_source
+    from app.utils.sheets import get_reference_tables  # avoid circular import
+    tables = get_reference_tables()
+    if _index is None or tables is not _index_source:
+        index = ReferenceIndex.from_tables(tables)
+        cutoff = time.monotonic() - LOCAL_ROW_GRACE
+        _local_rows[:] = [entry for entry in _local_rows if entry[0] >= cutoff]
+        for _, sheet_name, row in _local_rows:
+            index.add(sheet_name, row)
+        _index, _index_source = index, tables
+    return _index
+
+def _add(index: ReferenceIndex, sheet_name: str, row: list) -> None:
+    """Record the row in the index now, append it to the sheet (batched) and update cached views after the write"""
+    from app.utils import sheets  # avoid circular import
+    headers = REFERENCE_HEADERS[sheet_name]
+    record = dict(zip(headers, row))
+    entry = (time.monotonic(), sheet_name, record)
+    index.add(sheet_name, record)
+    _local_rows.append(entry)
+    sheets.append_rows(
+        _get_sheet(sheet_name), [row],
+        after=lambda: sheets.reference_rows_added(sheet_name, headers, [row]),
+        rollback=lambda: _forget(entry),
+    )
+
+def _forget(entry) -> None:
+    """The append never reached the sheet: drop the row and rebuild the index without it"""
+    global _index
+    with _lock:
+        _local_rows[:] = [e for e in _local_rows if e is not entry]
+        _index = None
+
 def get_reference_data(sheet: gspread.Spreadsheet, sheet_name: str, key_field: str, composite_key: Optional[Tuple[str, str]] = None) -> Dict:
     ws = sheet.worksheet(sheet_name)
     values = ws.get_all_records()
@@ -17,50 +117,43 @@ def get_reference_data(sheet: gspread.Spreadsheet, sheet_name: str, key_field: s
     return ref_map
 
 def add_type_if_not_exists(type_: str, category: str):
-    ws = _get_sheet("Ref_Types")
-    values = ws.get_all_records()
-
-    for row in values:
-        if row.get("Type") == type_ and row.get("Category") == category:
+    with _lock:
+        index = _current_index()
+        if (type_, category) in index.types:
             return
-
-    existing_for_category = [row for row in values if row.get("Category") == category]
-    new_code = str(len(existing_for_category) + 1).zfill(2)
-    ws.append_row([type_, category, new_code])
+        new_code = str(index.types_per_category[category] + 1).zfill(2)
+        _add(index, "Ref_Types", [type_, category, new_code])
 
 def validate_category_or_default(category: str) -> str:
-    ws = _get_sheet("Ref_Categories")
-    categories = {row["Category"] for row in ws.get_all_records()}
+    with _lock:
+        categories = _current_index().categories
     return category if category in categories else "Others"
 
 def add_location_if_not_exists(location: str, room: str):
-    ws = _get_sheet("Ref_Location")
-    values = ws.get_all_records()
-    for row in values:
-        if row.get("Location") == location and row.get("Room") == room:
+    with _lock:
+        index = _current_index()
+        if (location, room) in index.locations:
             return
-    ws.append_row([location, room])
+        _add(index, "Ref_Location", [location, room])
 
 def add_company_with_code_if_not_exists(company: str, code: str):
-    ws = _get_sheet("Ref_Companies")
-    values = ws.get_all_records()
-    for row in values:
-        if row.get("Company") == company:
+    with _lock:
+        index = _current_index()
+        if company in index.companies:
             return
-    ws.append_row([company, code])
+        _add(index, "Ref_Companies", [company, code])
 
 def add_owner_if_not_exists(owner: str, code: str = ""):
-    ws = _get_sheet("Ref_Owners")
-    values = ws.get_all_records()
-    for row in values:
-        if row.get("Owner") == owner:
+    with _lock:
+        index = _current_index()
+        if owner in index.owners:
             return
-    
-    # Generate code if not provided
-    if not code:
-        code = str(len(values) + 1).zfill(2)
-    
-    ws.append_row([owner, code])
+
+        # Generate code if not provided
+        if not code:
+            code = str(index.owner_rows + 1).zfill(2)
+
+        _add(index, "Ref_Owners", [owner, code])
 
 def add_category_if_not_exists(category: str, code: str):
     # Do nothing, category is fixed and should not be added dynamically
@@ -0,0 +1,201 @@
+# app/utils/sheet_version.py
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from app.utils import google_auth, http_pool
+
+# ========================
+# Deteksi Perubahan Spreadsheet (Drive version)
+# ========================
+# Worker background membaca metadata file spreadsheet dari Drive API
+# (`version`, `modifiedTime`) setiap POLL_INTERVAL detik. Panggilan ini tidak
+# memakai kuota Sheets. Cache data sheet diberi kunci versi ini, jadi data
+# boleh di-cache selama sheet tidak berubah. Saat versi berubah (edit langsung
+# di spreadsheet atau tulisan aplikasi sendiri) listener dijalankan dulu,
+# baru versi baru dipublikasikan ke pembaca.
+# Tulisan aplikasi sendiri yang sudah diterapkan ke cache/mirror dicatat
+# sebagai pasangan versi (sebelum -> sesudah): begin_write() membaca versi
+# bersamaan dengan tulisan dikirim, end_write() membaca versi sesudahnya.
+# Keduanya berjalan di thread background, request tidak menunggu Drive.
+# Perubahan yang bisa dicapai dari versi terpublikasi hanya lewat pasangan
+# itu cukup memindahkan cache ke kunci versi baru; selain itu (edit langsung
+# di sheet sebelum tulisan aplikasi, atau pembacaan yang gagal) reload biasa.
+# Edit langsung yang jatuh di antara pembacaan "sebelum" dan "sesudah" satu
+# tulisan (beberapa ratus milidetik) ikut dianggap milik aplikasi.
+OWN_VERSIONS_KEPT = 50
+WRITE_CHECK_WORKERS = 4
+POLL_INTERVAL = float(os.getenv("SHEET_CHANGE_POLL_SECONDS", "15"))
+DRIVE_FILE_URL = "https://www.googleapis.com/drive/v3/files/{file_id}"
+
+class SheetVersionProbe:
+    def __init__(self, interval: float = POLL_INTERVAL):
+        self.interval = interval
+        self._version: Optional[str] = None
+        self._modified_time: Optional[str] = None
+        self._checked_at = 0.0
+        self._listeners: List[Callable[[str], None]] = []
+        self._own_write_listeners: List[Callable[[str, str], None]] = []
+        self._own_edges = deque(maxlen=OWN_VERSIONS_KEPT)  # (versi sebelum, versi sesudah)
+        self._write_checks = None
+        self._session = http_pool.get_session("drive")
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {"polls": 0, "changes": 0, "own_changes": 0, "errors": 0}
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """listener(new_version) runs in the probe thread before the version is published"""
+        self._listeners.append(listener)
+
+    def add_own_write_listener(self, listener: Callable[[str, str], None]) -> None:
+        """listener(previous, new_version) runs instead of the change listeners for the app's own writes"""
+        self._own_write_listeners.append(listener)
+
+    def begin_write(self):
+        """Call right before an app write; returns a token for end_write (None while the probe is off)"""
+        if self.current() is None:
+            return None
+        return self._executor().submit(self._fetch)
+
+    def end_write(self, token) -> None:
+        """The write of `token` reached the sheet and was already applied locally"""
+        if token is None:
+            return
+        executor = self._executor()
+        token.add_done_callback(lambda before: executor.submit(self._record_write, before))
+
+    def _record_write(self, before) -> None:
+        try:
+            previous, _ = before.result()
+            version, _ = self._fetch()
+        except Exception as e:
+            logging.warning(f"Sheet version check around write failed: {e}")
+            return
+        if version != previous:
+            with self._lock:
+                self._own_edges.append((previous, version))
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._write_checks is None:
+                self._write_checks = ThreadPoolExecutor(WRITE_CHECK_WORKERS, thread_name_prefix="sheet-version-write")
+            return self._write_checks
+
+    def _is_own_change(self, previous: str, version: str) -> bool:
+        """Whether version is reachable from previous through the app's own writes only"""
+        with self._lock:
+            edges = list(self._own_edges)
+        reached, grew = {previous}, True
+        while grew:
+            grew = False
+            for before, after in edges:
+                if before in reached and after not in reached:
+                    reached.add(after)
+                    grew = True
+        return version in reached
+
+    def current(self) -> Optional[str]:
+        """Published version, or None when unknown or the probe has not succeeded recently"""
+        if self._version is None or time.monotonic() - self._checked_at > 3 * self.interval:
+            return None
+        return self._version
+
+    def start(self) -> None:
+        if self.interval <= 0 or not os.getenv("GOOGLE_SHEET_ID"):
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sheet-version-probe", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        with self._lock:
+            write_checks, self._write_checks = self._write_checks, None
+        if write_checks:
+            write_checks.shutdown(wait=False)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.poll()
+            self._stop.wait(self.interval)
+
+    def poll(self) -> None:
+        try:
+            version, modified_time = self._fetch()
+        except Exception as e:
+            self.stats["errors"] += 1
+            logging.warning(f"Sheet change probe failed: {e}")
+            return
+        self.stats["polls"] += 1
+        previous = self._version
+        if previous is not None and version != previous:
+            if self._is_own_change(previous, version):
+                self.stats["own_changes"] += 1
+                calls = [(listener, (previous, version)) for listener in self._own_write_listeners]
+            else:
+                self.stats["changes"] += 1
+                logging.info(f"Spreadsheet changed (version {previous} -> {version}, modified {modified_time})")
+                calls = [(listener, (version,)) for listener in self._listeners]
+            for listener, args in calls:
+                try:
+                    listener(*args)
+                except Exception as e:
+                    logging.warning(f"Sheet change listener {getattr(listener, '__name__', listener)} failed: {e}")
+        self._version, self._modified_time = version, modified_time
+        self._checked_at = time.monotonic()
+
+    def _fetch(self):
+        response = self._session.get(
+            DRIVE_FILE_URL.format(file_id=os.getenv("GOOGLE_SHEET_ID")),
+            params={"fields": "version,modifiedTime", "supportsAllDrives": "true"},
+            headers={"Authorization": f"Bearer {google_auth.get_token(google_auth.SHEETS_SCOPES)}"},
+            timeout=http_pool.timeouts(10),
+        )
+        response.raise_for_status()
+        body = response.json()
+        return str(body["version"]), body.get("modifiedTime")
+
+    def snapshot(self) -> dict:
+        return {
+            "version": self._version,
+            "modified_time": self._modified_time,
+            "active": self.current() is not None,
+            "interval_seconds": self.interval,
+            **self.stats,
+        }
+
+_probe = SheetVersionProbe()
+
+def current() -> Optional[str]:
+    return _probe.current()
+
+def add_listener(listener: Callable[[str], None]) -> None:
+    _probe.add_listener(listener)
+
+def add_own_write_listener(listener: Callable[[str, str], None]) -> None:
+    _probe.add_own_write_listener(listener)
+
+def begin_write():
+    return _probe.begin_write()
+
+def end_write(token) -> None:
+    _probe.end_write(token)
+
+def start() -> None:
+    _probe.start()
+
+def stop() -> None:
+    _probe.stop()
+
+def get_stats() -> dict:
+    return _probe.snapshot()
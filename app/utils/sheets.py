@@ -1,13 +1,16 @@
 import os
-import json
+import re
+import asyncio
 import gspread
 import logging
-from decimal import Decimal, InvalidOperation
-from collections import defaultdict
-from datetime import datetime
-from google.oauth2.service_account import Credentials
-from app.utils.cache import get_cached_data, clear_cache
+import threading
+from app.utils.cache import get_cached_data, peek_cached_data, clear_cache, seed_cache, SingleFlight, AsyncSingleFlight
+from app.utils import asset_store, tag_sequences, data_snapshot, quota, google_async, google_auth, http_pool, sheet_version
+from app.utils.asset_compute import compute_asset_columns, tag_key
 from functools import wraps
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections import defaultdict
 import time
 
 # ========================
@@ -24,7 +27,8 @@ def retry_on_api_error(max_retries=3, backoff_factor=1):
                 try:
                     return func(*args, **kwargs)
                 except (gspread.exceptions.APIError, ConnectionError, Exception) as e:
-                    if attempt == max_retries - 1:
+                    # 429 sudah ditunggu & diulang oleh penjadwal kuota; jangan retry buta
+                    if attempt == max_retries - 1 or _is_quota_error(e):
                         logging.error(f"API call failed after {max_retries} attempts: {e}")
                         raise
                     wait_time = backoff_factor * (2 ** attempt)
@@ -34,29 +38,26 @@ def retry_on_api_error(max_retries=3, backoff_factor=1):
         return wrapper
     return decorator
 
+def _is_quota_error(error: Exception) -> bool:
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == 429
+
 @retry_on_api_error(max_retries=3, backoff_factor=2)
 def get_sheet():
     global _sheet_cache
+    # Tanpa probe liveness: objek spreadsheet hanya ID + client, error
+    # jaringan muncul (dan di-retry) di panggilan yang sebenarnya.
     if _sheet_cache:
-        try:
-            _sheet_cache.get_worksheet_by_id(0)
-            return _sheet_cache
-        except:
-            _sheet_cache = None
-            clear_worksheet_cache()
+        return _sheet_cache
 
-    creds_json_str = os.getenv("GOOGLE_CREDS_JSON")
     sheet_id = os.getenv("GOOGLE_SHEET_ID")
-    if not creds_json_str or not sheet_id:
+    if not os.getenv("GOOGLE_CREDS_JSON") or not sheet_id:
         logging.error("GOOGLE_CREDS_JSON dan/atau GOOGLE_SHEET_ID belum di-set di environment.")
         raise RuntimeError("Google Sheets credentials or sheet ID not set.")
 
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    creds_json = json.loads(creds_json_str)
-    if "private_key" in creds_json:
-        creds_json["private_key"] = creds_json["private_key"].replace("\\n", "\n")
-    creds = Credentials.from_service_account_info(creds_json, scopes=scope)
-    client = gspread.authorize(creds)
+    creds = google_auth.get_credentials(google_auth.SHEETS_SCOPES)
+    # Semua request gspread lewat penjadwal kuota (token bucket baca/tulis)
+    client = gspread.Client(auth=creds, session=http_pool.mount(quota.ScheduledSession(creds), "sheets"))
     _sheet_cache = client.open_by_key(sheet_id)
     return _sheet_cache
 
@@ -74,285 +75,850 @@ def get_worksheet(name: str):
             return None
     return _worksheets_cache[name]
 
+def _require_worksheet(name: str):
+    """get_worksheet() that raises when Sheets can't be reached; None only if the sheet doesn't exist"""
+    ws = get_worksheet(name)
+    if ws is None and name not in _worksheets_cache:
+        raise ConnectionError(f"Worksheet '{name}' could not be opened")
+    return ws
+
+def get_or_create_worksheet(name: str, headers: list, rows: int = 1000):
+    """Worksheet by name, created with a header row when it does not exist yet"""
+    ws = get_worksheet(name)
+    if ws:
+        return ws
+    ws = get_sheet().add_worksheet(title=name, rows=rows, cols=len(headers))
+    ws.append_row(headers)
+    _worksheets_cache[name] = ws
+    return ws
+
 def clear_worksheet_cache():
     global _worksheets_cache
     _worksheets_cache.clear()
+    invalidate_asset_index()
 
 # ========================
-# Referensi Dropdown Input
+# Write Buffer (satu unit of work per request)
 # ========================
-def get_reference_lists() -> dict:
-    return get_cached_data("reference_lists", _load_all_references)
+# Di dalam `with write_batch():` semua update sel dan append baris ditahan,
+# lalu dikirim saat blok selesai: satu batch_update + satu append_rows per
+# worksheet. Jika blok gagal, tidak ada yang ditulis; jika flush gagal,
+# exception diteruskan ke pemanggil seperti update_cell biasa. Callback
+# `rollback` dari append yang tidak sampai ke sheet dijalankan di kedua kasus.
+_write_buffer: ContextVar = ContextVar("sheet_write_buffer", default=None)
+
+class SheetWriteBuffer:
+    def __init__(self):
+        self._worksheets = {}
+        self._updates = defaultdict(list)
+        self._appends = defaultdict(list)
+        self._after_flush = []
+        self._rollbacks = defaultdict(list)  # worksheet -> rollback append yang belum ditulis
+        self._untracked = False  # ada tulisan tanpa callback: cache lokal tidak ikut diperbarui
+
+    def _key(self, ws) -> int:
+        self._worksheets[ws.id] = ws
+        return ws.id
+
+    def update(self, ws, changes: list, after=None) -> None:
+        self._updates[self._key(ws)].extend(changes)
+        if after:
+            self._after_flush.append(after)
+        else:
+            self._untracked = True
+
+    def append_rows(self, ws, rows: list, after=None, rollback=None) -> None:
+        key = self._key(ws)
+        self._appends[key].extend(rows)
+        if rollback:
+            self._rollbacks[key].append(rollback)
+        if after:
+            self._after_flush.append(after)
+        else:
+            self._untracked = True
+
+    def flush(self) -> None:
+        token = sheet_version.begin_write()
+        try:
+            for key, changes in self._updates.items():
+                _batch_update_now(self._worksheets[key], changes)
+            for key, rows in self._appends.items():
+                _append_rows_now(self._worksheets[key], rows)
+                self._rollbacks.pop(key, None)
+        except BaseException:
+            self.discard()
+            raise
+        for callback in self._after_flush:
+            callback()
+        if self._after_flush and not self._untracked:
+            sheet_version.end_write(token)
+        self._updates.clear()
+        self._appends.clear()
+        self._after_flush.clear()
+        self._untracked = False
+
+    def discard(self) -> None:
+        """Nothing (more) will be written: undo local state of appends that did not reach the sheet"""
+        rollbacks = [callback for callbacks in self._rollbacks.values() for callback in callbacks]
+        self._updates.clear()
+        self._appends.clear()
+        self._after_flush.clear()
+        self._rollbacks.clear()
+        for callback in rollbacks:
+            try:
+                callback()
+            except Exception as e:
+                logging.warning(f"Write rollback failed: {e}")
+
+@contextmanager
+def write_batch():
+    """Collect Sheets writes made inside the block and flush them together"""
+    buffer = _write_buffer.get()
+    if buffer is not None:
+        # Nested: ikut buffer terluar
+        yield buffer
+        return
+    buffer = SheetWriteBuffer()
+    token = _write_buffer.set(buffer)
+    try:
+        yield buffer
+    except BaseException:
+        buffer.discard()
+        raise
+    finally:
+        _write_buffer.reset(token)
+    buffer.flush()
 
-@retry_on_api_error()
-def _load_all_references() -> dict:
-    ref_data = {"categories": [], "types": [], "companies": [], "owners": [], "locations": [], "rooms": []}
+@retry_on_api_error(max_retries=2)
+def _batch_update_now(ws, changes: list) -> None:
+    ws.batch_update(changes)
+
+@retry_on_api_error(max_retries=2)
+def _append_rows_now(ws, rows: list) -> None:
+    ws.append_rows(rows)
+
+def batch_update(ws, changes: list, after=None) -> None:
+    """ws.batch_update(), deferred when a write_batch() is active"""
+    buffer = _write_buffer.get()
+    if buffer is not None:
+        buffer.update(ws, changes, after)
+        return
+    token = sheet_version.begin_write()
+    _batch_update_now(ws, changes)
+    if after:
+        after()
+        sheet_version.end_write(token)
+
+def append_rows(ws, rows: list, after=None, rollback=None) -> None:
+    """ws.append_rows(), deferred when a write_batch() is active; rollback() runs if the rows are never written"""
+    buffer = _write_buffer.get()
+    if buffer is not None:
+        buffer.append_rows(ws, rows, after, rollback)
+        return
+    token = sheet_version.begin_write()
     try:
-        sheet_names = ["Ref_Categories", "Ref_Types", "Ref_Companies", "Ref_Owners", "Ref_Location"]
-        worksheets = {name: get_worksheet(name) for name in sheet_names}
-
-        if worksheets["Ref_Categories"]:
-            values = worksheets["Ref_Categories"].col_values(1)[1:]
-            ref_data["categories"] = sorted({v.strip() for v in values if v.strip()})
-
-        if worksheets["Ref_Types"]:
-            ref_data["types"] = worksheets["Ref_Types"].get_all_records()
-
-        if worksheets["Ref_Companies"]:
-            records = worksheets["Ref_Companies"].get_all_records()
-            ref_data["companies"] = [f"{r['Company']} ({r['Code Company']})" for r in records]
-
-        if worksheets["Ref_Owners"]:
-            values = worksheets["Ref_Owners"].col_values(1)[1:]
-            ref_data["owners"] = sorted({v.strip() for v in values if v.strip()})
-
-        if worksheets["Ref_Location"]:
-            records = worksheets["Ref_Location"].get_all_records()
-            locations, rooms = set(), set()
-            for row in records:
-                loc, room = row.get("Location", "").strip(), row.get("Room", "").strip()
-                if loc: locations.add(loc)
-                if room: rooms.add(room)
-            ref_data["locations"] = sorted(locations)
-            ref_data["rooms"] = sorted(rooms)
+        _append_rows_now(ws, rows)
+    except BaseException:
+        if rollback:
+            rollback()
+        raise
+    if after:
+        after()
+        sheet_version.end_write(token)
 
-        return ref_data
+# ========================
+# Referensi Dropdown Input
+# ========================
+# Referensi jarang berubah: setelah REFERENCE_TTL nilai lama tetap dipakai
+# sambil di-refresh di background; baru setelah REFERENCE_STALE_TTL request menunggu.
+REFERENCE_TTL = 300
+REFERENCE_STALE_TTL = 3600
+# Selama probe versi aktif, data sheet di-cache per versi spreadsheet;
+# TTL ini hanya batas pengaman, normalnya kunci berganti saat sheet berubah.
+SHEET_VERSION_TTL = int(os.getenv("SHEET_VERSION_CACHE_TTL", "86400"))
+
+def _sheet_cached(key: str, builder, version: str = None, snapshot_name: str = None):
+    """Sheet-derived data cached per spreadsheet version, or by TTL while the version is unknown"""
+    version = version or sheet_version.current()
+    if version is None:
+        return get_cached_data(key, builder, REFERENCE_TTL, REFERENCE_STALE_TTL)
+    versioned_key = f"{key}@{version}"
+    value = get_cached_data(versioned_key, builder, SHEET_VERSION_TTL)
+    if data_snapshot.serving_snapshot(snapshot_name or key):
+        # Salinan lokal (Sheets gagal dibaca) tidak boleh menempel di versi ini
+        clear_cache(versioned_key)
+    return value
+
+# Semua sheet Ref_* dibaca dengan satu values:batchGet. Tabel mentahnya
+# di-cache (dan disimpan di snapshot data); daftar dropdown, peta
+# lokasi->ruangan dan lookup kode untuk sync diturunkan dari tabel itu dan
+# di-cache dengan versi yang sama.
+REFERENCE_SHEETS = ("Ref_Categories", "Ref_Types", "Ref_Companies", "Ref_Owners", "Ref_Location")
+REFERENCE_VIEWS = ("reference_lists", "location_room_map", "sync_references")
+
+def get_reference_lists() -> dict:
+    try:
+        return _reference_view("reference_lists", _build_reference_lists)
     except Exception as e:
-        logging.warning(f"Gagal load reference data: {e}")
-        return ref_data
+        logging.warning(f"Gagal load reference lists: {e}")
+        return _build_reference_lists(None)
 
 def get_location_room_map() -> dict:
-    return get_cached_data("location_room_map", _build_location_room_map)
-
-def _build_location_room_map() -> dict:
     try:
-        ws = get_worksheet("Ref_Location")
-        if not ws:
-            return {}
-
-        mapping = {}
-        for row in ws.get_all_records():
-            location = row.get("Location", "").strip()
-            room = row.get("Room", "").strip()
-            if location:
-                mapping.setdefault(location, []).append(room)
-        return mapping
+        return _reference_view("location_room_map", _build_location_room_map)
     except Exception as e:
         logging.warning(f"Gagal ambil lokasi & ruangan: {e}")
         return {}
 
+def get_sync_references() -> dict:
+    return _reference_view("sync_references", _build_sync_references)
+
+def get_reference_tables() -> dict:
+    """Raw Ref_* tables (sheet name -> rows incl. header); raises when neither Sheets nor a snapshot has them"""
+    return _reference_tables()
+
+def reference_rows_added(sheet_name: str, headers: list, rows: list) -> None:
+    """Write-through after an append to a Ref_* sheet: extend the cached tables, rebuild derived views"""
+    tables = peek_cached_data("reference_tables") or {}
+    version = sheet_version.current()
+    if version is not None:
+        tables = peek_cached_data(f"reference_tables@{version}") or tables
+    if tables:
+        table = tables.setdefault(sheet_name, [])
+        if not table:
+            table.append(list(headers))
+        # Versi baru mungkin sudah dibaca ulang dan memuat baris ini
+        table.extend(list(row) for row in rows if list(row) not in table)
+    for key in REFERENCE_VIEWS:
+        clear_cache(key)
+        if version is not None:
+            clear_cache(f"{key}@{version}")
+
+def _reference_view(key: str, build, version: str = None):
+    """Structure derived from the reference tables, cached under the same spreadsheet version"""
+    version = version or sheet_version.current()
+    return _sheet_cached(key, lambda: build(_reference_tables(version)), version, snapshot_name="reference_tables")
+
+def _reference_tables(version: str = None) -> dict:
+    return _sheet_cached("reference_tables", _load_reference_tables, version)
+
+def _load_reference_tables() -> dict:
+    tables = _with_saved_snapshot("reference_tables", _fetch_reference_tables, None)
+    if tables is None:
+        # Tidak di-cache: panggilan berikutnya mencoba Sheets lagi
+        raise ConnectionError("Reference sheets could not be loaded and no saved snapshot exists")
+    return tables
+
+def _with_saved_snapshot(name: str, builder, default):
+    """Run a full Sheets read; keep its result on disk and fall back to it when Sheets is unreachable"""
+    if not data_snapshot.should_try_live(name):
+        return data_snapshot.load(name)
+    try:
+        value = builder()
+    except Exception as e:
+        saved = data_snapshot.load(name)
+        if saved is None:
+            logging.warning(f"Gagal load {name}: {e}")
+            return default
+        data_snapshot.mark_unreachable(name)
+        logging.warning(f"Sheets unreachable, serving {name} from saved snapshot: {e}")
+        return saved
+    data_snapshot.save(name, value)
+    return value
+
+@retry_on_api_error()
+def _fetch_reference_tables() -> dict:
+    """{sheet name: rows incl. header} for every Ref_* sheet, in one batchGet; missing sheets map to []"""
+    try:
+        names = list(REFERENCE_SHEETS)
+        try:
+            response = get_sheet().values_batch_get([google_async.a1_range(name) for name in names])
+        except gspread.exceptions.APIError as e:
+            if getattr(e.response, "status_code", None) != 400:
+                raise
+            # Range ke sheet yang tidak ada menggagalkan seluruh batch: ulangi tanpa sheet itu
+            existing = {ws.title for ws in get_sheet().worksheets()}
+            names = [name for name in names if name in existing]
+            for name in set(REFERENCE_SHEETS) - existing:
+                logging.warning(f"Sheet '{name}' not found.")
+            response = get_sheet().values_batch_get([google_async.a1_range(name) for name in names]) if names else {}
+
+        tables = {name: [] for name in REFERENCE_SHEETS}
+        for name, value_range in zip(names, response.get("valueRanges", [])):
+            tables[name] = value_range.get("values", [])
+        return tables
+    except Exception as e:
+        logging.warning(f"Gagal load reference data: {e}")
+        raise
+
+def _table_records(tables: dict, name: str) -> list:
+    """Rows of one reference table shaped like ws.get_all_records()"""
+    values = tables.get(name) or []
+    if not values:
+        return []
+    headers = values[0]
+    return _rows_to_records(headers, [row + [""] * (len(headers) - len(row)) for row in values[1:]])
+
+def _first_column(tables: dict, name: str) -> list:
+    return [row[0] if row else "" for row in (tables.get(name) or [])[1:]]
+
+def _build_reference_lists(tables) -> dict:
+    ref_data = {"categories": [], "types": [], "companies": [], "owners": [], "locations": [], "rooms": []}
+    if not tables:
+        return ref_data
+
+    ref_data["categories"] = sorted({v.strip() for v in _first_column(tables, "Ref_Categories") if v.strip()})
+    ref_data["types"] = _table_records(tables, "Ref_Types")
+    ref_data["companies"] = [f"{r['Company']} ({r['Code Company']})" for r in _table_records(tables, "Ref_Companies")]
+    ref_data["owners"] = sorted({v.strip() for v in _first_column(tables, "Ref_Owners") if v.strip()})
+
+    locations, rooms = set(), set()
+    for row in _table_records(tables, "Ref_Location"):
+        loc, room = str(row.get("Location", "")).strip(), str(row.get("Room", "")).strip()
+        if loc: locations.add(loc)
+        if room: rooms.add(room)
+    ref_data["locations"] = sorted(locations)
+    ref_data["rooms"] = sorted(rooms)
+    return ref_data
+
+def _build_location_room_map(tables) -> dict:
+    mapping = {}
+    for row in _table_records(tables or {}, "Ref_Location"):
+        location = str(row.get("Location", "")).strip()
+        room = str(row.get("Room", "")).strip()
+        if location:
+            mapping.setdefault(location, []).append(room)
+    return mapping
+
+def _build_sync_references(tables) -> dict:
+    ref_data = {"categories": {}, "types": {}, "companies": {}, "owners": {}}
+    for row in _table_records(tables, "Ref_Categories"):
+        ref_data["categories"][row["Category"]] = {
+            "Code Category": row["Code Category"],
+            "Residual Percent": row["Residual Percent"],
+            "Useful Life": row["Useful Life"]
+        }
+    for row in _table_records(tables, "Ref_Types"):
+        ref_data["types"][(row["Type"], row["Category"])] = row["Code Type"]
+    for row in _table_records(tables, "Ref_Companies"):
+        ref_data["companies"][row["Company"]] = row["Code Company"]
+    for row in _table_records(tables, "Ref_Owners"):
+        ref_data["owners"][row["Owner"]] = row["Code Owner"]
+    return ref_data
+
 # ========================
 # Ambil Data Aset
 # ========================
+_assets_flight = SingleFlight()
+_warming_up = threading.Event()
+
 def get_assets(status_filter: str = "All") -> list:
+    version = sheet_version.current()
+    if version is not None and not _warming_up.is_set():
+        # Sheet tidak berubah sejak versi ini: register lengkap aman di-cache
+        try:
+            data = get_cached_data(_register_key(version), _load_live_assets, SHEET_VERSION_TTL)
+        except Exception as e:
+            logging.warning(f"Gagal mengambil data aset: {e}")
+            data = _assets_fallback()
+        return _filter_status(data, status_filter)
+    mirrored = asset_store.load(status_filter)
+    if mirrored is not None:
+        return mirrored
+    saved = _assets_from_saved_snapshot()
+    if saved is not None:
+        return _filter_status(saved, status_filter)
     try:
-        ws = get_worksheet("Assets")
-        if not ws:
-            return []
-        data = ws.get_all_records()
-        if status_filter != "All":
-            return [row for row in data if row.get("Status", "").lower() == status_filter.lower()]
-        return data
+        # Mirror belum siap: request bersamaan berbagi satu get_all_records
+        data = _assets_flight.do("Assets", _load_assets_from_sheet)
+    except Exception as e:
+        logging.warning(f"Gagal mengambil data aset: {e}")
+        data = _assets_fallback()
+    return _filter_status(data, status_filter)
+
+def _register_key(version: str) -> str:
+    return f"assets@{version}"
+
+def _load_live_assets() -> list:
+    """Full register from the PG mirror or Sheets; raises instead of falling back"""
+    mirrored = asset_store.load("All")
+    if mirrored is not None:
+        return mirrored
+    return _assets_flight.do("Assets", _load_assets_from_sheet)
+
+def _drop_cached_assets() -> None:
+    """The mirror changed locally: the register cached for the current version is outdated"""
+    version = sheet_version.current()
+    if version is not None:
+        clear_cache(_register_key(version))
+
+def _filter_status(data: list, status_filter: str) -> list:
+    if status_filter != "All":
+        return [row for row in data if row.get("Status", "").lower() == status_filter.lower()]
+    return data
+
+def _assets_from_saved_snapshot():
+    """Saved copy while the startup refresh runs or Sheets was just unreachable, else None"""
+    if _warming_up.is_set() or not data_snapshot.should_try_live("assets"):
+        return data_snapshot.load("assets")
+    return None
+
+def _assets_fallback() -> list:
+    saved = data_snapshot.load("assets")
+    if saved is None:
+        return []
+    data_snapshot.mark_unreachable("assets")
+    return saved
+
+def _load_assets_from_sheet() -> list:
+    ws = _require_worksheet("Assets")
+    if not ws:
+        return []
+    data = ws.get_all_records()
+    _store_assets(list(data[0].keys()) if data else [], data)
+    return data
+
+_assets_async_flight = AsyncSingleFlight()
+
+async def get_assets_async(status_filter: str = "All") -> list:
+    """get_assets() for async routes: the Sheets read does not hold a worker thread"""
+    version = sheet_version.current()
+    if version is not None and not _warming_up.is_set():
+        cached = peek_cached_data(_register_key(version))
+        if cached is not None:
+            return _filter_status(cached, status_filter)
+    if asset_store.is_ready():
+        mirrored = await asyncio.to_thread(asset_store.load, status_filter)
+        if mirrored is not None:
+            return mirrored
+    saved = _assets_from_saved_snapshot()
+    if saved is not None:
+        return _filter_status(saved, status_filter)
+    try:
+        data = await _assets_async_flight.do("Assets", _load_assets_async)
     except Exception as e:
         logging.warning(f"Gagal mengambil data aset: {e}")
+        data = _assets_fallback()
+    return _filter_status(data, status_filter)
+
+async def _load_assets_async() -> list:
+    values = await google_async.values_get(google_async.a1_range("Assets"))
+    if not values:
         return []
+    headers, rows = values[0], values[1:]
+    width = len(headers)
+    data = _rows_to_records(headers, [row + [""] * (width - len(row)) for row in rows])
+    await asyncio.to_thread(_store_assets, headers, data)
+    return data
+
+def _store_assets(headers: list, data: list) -> None:
+    """A full, fresh read of Assets: update the PG mirror, the row index and the saved snapshot"""
+    asset_store.replace_all(data)
+    if data:
+        _index_from_rows(headers, data)
+    _drop_cached_assets()
+    data_snapshot.save("assets", data)
+
+def warm_up() -> None:
+    """Startup: serve the saved snapshot / PG mirror immediately and refresh from Sheets in the background"""
+    data_snapshot.preload()
+    saved = data_snapshot.load("reference_tables")
+    if saved is not None:
+        seed_cache("reference_tables", saved, REFERENCE_STALE_TTL)
+    restored = asset_store.restore()
+    if data_snapshot.load("assets") is None and not restored:
+        return
+    _warming_up.set()
+    threading.Thread(target=_refresh_assets, name="assets-warm-up", daemon=True).start()
+
+def _on_sheet_changed(version: str) -> None:
+    """Probe saw a new spreadsheet version: reload before readers switch to it"""
+    invalidate_asset_index()
+    with quota.background_priority():
+        _assets_flight.do("Assets", _load_assets_from_sheet)
+        for key, build in (("reference_lists", _build_reference_lists),
+                           ("location_room_map", _build_location_room_map)):
+            _reference_view(key, build, version)
+
+def _on_own_write(previous: str, version: str) -> None:
+    """The new version is the app's own write, already applied locally: move the caches instead of reloading"""
+    for key in ("assets", "reference_tables") + REFERENCE_VIEWS:
+        value = peek_cached_data(f"{key}@{previous}")
+        if value is not None:
+            get_cached_data(f"{key}@{version}", lambda: value, SHEET_VERSION_TTL)
+
+sheet_version.add_listener(_on_sheet_changed)
+sheet_version.add_own_write_listener(_on_own_write)
+
+def _refresh_assets() -> None:
+    try:
+        with quota.background_priority():
+            _assets_flight.do("Assets", _load_assets_from_sheet)
+    except Exception as e:
+        data_snapshot.mark_unreachable("assets")
+        logging.warning(f"Startup refresh of Assets failed, serving saved snapshot: {e}")
+    finally:
+        _warming_up.clear()
+
+def get_asset(asset_id: str):
+    if asset_store.is_ready():
+        asset = asset_store.find(asset_id)
+        if asset is not None or asset_store.is_ready():
+            return asset
+    key = asset_store.asset_id_key(asset_id)
+    return next((a for a in get_assets("All") if asset_store.asset_id_key(a.get("ID", "")) == key), None)
+
+def _rows_to_records(headers: list, rows: list) -> list:
+    """Same shape as ws.get_all_records() for values already in memory"""
+    return [dict(zip(headers, gspread.utils.numericise_all(row))) for row in rows]
+
+# ========================
+# Indeks Baris Aset (ID / Asset Tag -> nomor baris)
+# ========================
+# Header dan posisi baris di-cache agar perubahan satu aset cukup satu baca
+# baris + satu tulis. Setiap pemakaian divalidasi dengan membaca baris target;
+# kalau ID di baris itu tidak cocok (urutan baris diubah langsung di sheet),
+# indeks dibangun ulang.
+_asset_index = {"headers": None, "ids": None, "tags": None}
+_asset_index_lock = threading.Lock()
+
+def invalidate_asset_index():
+    with _asset_index_lock:
+        _asset_index.update(headers=None, ids=None, tags=None)
+
+def get_asset_headers() -> list:
+    """Header row of the Assets worksheet (cached)"""
+    headers = _asset_index["headers"]
+    if headers is None:
+        ws = get_worksheet("Assets")
+        headers = ws.row_values(1) if ws else []
+        _asset_index["headers"] = headers
+    return headers
+
+def get_asset_column(name: str):
+    """1-based column number of a header, or None"""
+    headers = get_asset_headers()
+    return headers.index(name) + 1 if name in headers else None
+
+def _set_asset_index(headers: list, ids: dict, tags: dict) -> None:
+    with _asset_index_lock:
+        _asset_index.update(headers=list(headers), ids=ids, tags=tags)
+
+def _index_from_rows(headers: list, rows: list, first_row: int = 2) -> None:
+    """Rebuild the index from values already in memory (sync / full reads)"""
+    id_col = headers.index("ID") if "ID" in headers else 0
+    tag_col = headers.index("Asset Tag") if "Asset Tag" in headers else None
+    ids, tags = {}, {}
+    for row_number, row in enumerate(rows, start=first_row):
+        values = list(row.values()) if isinstance(row, dict) else row
+        if len(values) > id_col and str(values[id_col]).strip():
+            ids.setdefault(asset_store.asset_id_key(values[id_col]), row_number)
+        if tag_col is not None and len(values) > tag_col and str(values[tag_col]).strip():
+            tags.setdefault(str(values[tag_col]).strip(), row_number)
+    _set_asset_index(headers, ids, tags)
+
+def _column_range(col: int) -> str:
+    letter = gspread.utils.rowcol_to_a1(1, col)[:-1]
+    return f"{letter}2:{letter}"
+
+@retry_on_api_error(max_retries=2)
+def _rebuild_asset_index() -> None:
+    """Download only the ID and Asset Tag columns in one batch_get"""
+    ws = get_worksheet("Assets")
+    if not ws:
+        return
+    _asset_index["headers"] = None
+    headers = get_asset_headers()
+    ranges = [_column_range(get_asset_column("ID") or 1)]
+    if "Asset Tag" in headers:
+        ranges.append(_column_range(get_asset_column("Asset Tag")))
+    columns = ws.batch_get(ranges)
+
+    ids, tags = {}, {}
+    normalizers = (asset_store.asset_id_key, lambda value: str(value).strip())
+    for mapping, column, normalize in zip((ids, tags), columns, normalizers):
+        for row_number, cell in enumerate(column, start=2):
+            if cell and str(cell[0]).strip():
+                mapping.setdefault(normalize(cell[0]), row_number)
+    _set_asset_index(headers, ids, tags)
+
+def find_asset_row(asset_id: str):
+    """Sheet row number for an asset ID (or Asset Tag), from the index"""
+    if _asset_index["ids"] is None:
+        _rebuild_asset_index()
+    ids, tags = _asset_index["ids"] or {}, _asset_index["tags"] or {}
+    return ids.get(asset_store.asset_id_key(asset_id)) or tags.get(str(asset_id).strip())
+
+def _row_matches(headers: list, values: list, asset_id: str) -> bool:
+    key = asset_store.asset_id_key(asset_id)
+    record = dict(zip(headers, values))
+    return (asset_store.asset_id_key(record.get("ID", "")) == key
+            or str(record.get("Asset Tag", "")).strip() == str(asset_id).strip())
+
+@retry_on_api_error(max_retries=2)
+def read_asset_row(asset_id: str):
+    """Return (row_number, record) for one asset with a single row read.
+
+    If the indexed row no longer holds that asset the index is rebuilt once.
+    """
+    ws = get_worksheet("Assets")
+    if not ws:
+        return None
+    for attempt in range(2):
+        row_number = find_asset_row(asset_id)
+        if row_number:
+            headers = get_asset_headers()
+            values = ws.row_values(row_number)
+            if _row_matches(headers, values, asset_id):
+                values += [""] * (len(headers) - len(values))
+                return row_number, dict(zip(headers, values))
+        if attempt == 0:
+            logging.info(f"Asset index stale for {asset_id}, rebuilding")
+            _rebuild_asset_index()
+    return None
+
+@retry_on_api_error(max_retries=2)
+def update_asset_fields(row_number: int, fields: dict) -> bool:
+    """Write several cells of one asset row in a single request"""
+    ws = get_worksheet("Assets")
+    if not ws:
+        return False
+    headers = get_asset_headers()
+    for name in fields:
+        if name not in headers:
+            # Tambahkan kolom baru (mis. Photo URL) di ujung header
+            headers = headers + [name]
+            ws.update("1:1", [headers])
+            _asset_index["headers"] = headers
+    changes = [
+        {"range": gspread.utils.rowcol_to_a1(row_number, headers.index(name) + 1), "values": [[value]]}
+        for name, value in fields.items()
+    ]
+    batch_update(ws, changes, after=lambda: _update_mirror_row(row_number, fields))
+    return True
+
+def _update_mirror_row(row_number: int, fields: dict) -> None:
+    asset_store.update_row(row_number, fields)
+    _drop_cached_assets()
+
+@retry_on_api_error(max_retries=2)
+def delete_asset_row(row_number: int) -> None:
+    ws = get_worksheet("Assets")
+    if not ws:
+        return
+    token = sheet_version.begin_write()
+    ws.delete_rows(row_number)
+    asset_store.delete_row(row_number)
+    _drop_cached_assets()
+    with _asset_index_lock:
+        for mapping in (_asset_index["ids"], _asset_index["tags"]):
+            if mapping is None:
+                continue
+            for key, row in list(mapping.items()):
+                if row == row_number:
+                    del mapping[key]
+                elif row > row_number:
+                    mapping[key] = row - 1
+    sheet_version.end_write(token)
 
 # ========================
 # Tambahkan Data Aset
 # ========================
+def asset_row_values(data: dict) -> list:
+    """Assets row for a new asset; calculated fields are left empty for sync to fill"""
+    purchase_date = data.get("purchase_date", "")
+    # Ensure date format without apostrophe prefix
+    if purchase_date and not purchase_date.startswith("="):
+        purchase_date = f"=DATE({purchase_date.split('-')[0]},{purchase_date.split('-')[1]},{purchase_date.split('-')[2]})"
+
+    return [
+        "", data.get("item_name", ""), data.get("category", ""), data.get("type", ""),
+        data.get("manufacture", ""), data.get("model", ""), data.get("serial_number", ""),
+        "", data.get("company", ""), data.get("bisnis_unit", ""),
+        data.get("location", ""), data.get("room_location", ""), data.get("notes", "Input dari Web"),
+        data.get("condition", ""), purchase_date, data.get("purchase_cost", ""),
+        data.get("warranty", "No"), data.get("supplier", ""), data.get("journal", ""),
+        data.get("owner", ""), "", "", "", "", "", data.get("status") or "Active", ""
+    ]
+
 @retry_on_api_error()
 def append_asset(data: dict):
     try:
         ws = get_worksheet("Assets")
         if not ws: return
 
-        # Add asset with empty calculated fields
-        purchase_date = data.get("purchase_date", "")
-        # Ensure date format without apostrophe prefix
-        if purchase_date and not purchase_date.startswith("="):
-            purchase_date = f"=DATE({purchase_date.split('-')[0]},{purchase_date.split('-')[1]},{purchase_date.split('-')[2]})"
-        
-        row_data = [
-            "", data.get("item_name", ""), data.get("category", ""), data.get("type", ""),
-            data.get("manufacture", ""), data.get("model", ""), data.get("serial_number", ""),
-            "", data.get("company", ""), data.get("bisnis_unit", ""),
-            data.get("location", ""), data.get("room_location", ""), data.get("notes", "Input dari Web"),
-            data.get("condition", ""), purchase_date, data.get("purchase_cost", ""),
-            data.get("warranty", "No"), data.get("supplier", ""), data.get("journal", ""),
-            data.get("owner", ""), "", "", "", "", "", "Active", ""
-        ]
-
-        ws.append_row(row_data)
-        
-        # Auto-sync to fill calculated fields
+        with _append_lock:
+            # Kolom turunan & Asset Tag dihitung untuk baris baru saja (tanpa full sync)
+            try:
+                row, prepared = _prepare_new_asset_row(data)
+            except Exception as e:
+                logging.warning(f"Incremental asset row failed, falling back to full sync: {e}")
+                row, prepared = asset_row_values(data), None
+
+            token = sheet_version.begin_write()
+            response = ws.append_row(row)
+            if prepared and _appended_row_number(response) == prepared["row_number"]:
+                _record_appended_asset(prepared)
+                sheet_version.end_write(token)
+                return
+
+        # Register berubah di luar aplikasi (atau perhitungan gagal): full sync sebagai perbaikan
         try:
             # Clear cache to ensure fresh reference data
             clear_cache()
             clear_worksheet_cache()
             
             sync_result = sync_assets_data()
+            if not sync_result.get("success"):
+                asset_store.invalidate()
             logging.info(f"Auto-sync after asset creation: {sync_result.get('message', 'completed')}")
         except Exception as sync_error:
+            asset_store.invalidate()
             logging.warning(f"Auto-sync failed after asset creation: {sync_error}")
             
     except Exception as e:
         logging.warning(f"Gagal menambahkan data aset: {e}")
 
 # ========================
-# Sync Data Aset
+# Tambah Aset Inkremental
 # ========================
-def to_decimal(value, default=Decimal(0)):
-    try:
-        return Decimal(str(value).replace(",", "").replace("Rp", "").strip())
-    except (InvalidOperation, AttributeError, ValueError):
-        return default
-
-def to_int(value, default=1):
-    try:
-        return int(value)
-    except (ValueError, TypeError):
-        return default
+# ID dan nomor urut Asset Tag diambil dari tabel asset_tag_sequences
+# (PostgreSQL) pada saat insert, jadi tetap unik antar submit dan proses.
+# Saat pertama kali dipakai di proses ini, nomor tag tertinggi yang sudah ada
+# di register dicatat dulu agar tabel yang baru dibuat tidak mengeluarkan
+# nomor lama (ID memakai ID tertinggi di register sebagai batas bawah).
+# Append lebih dulu dibuat lengkap lalu dicek: kalau baris yang ditambahkan
+# Sheets bukan baris yang diperkirakan, full sync dijalankan; sync tidak
+# mengubah ID dan tag yang sudah sah. _append_lock hanya menjaga perkiraan
+# nomor baris: submit paralel di proses ini tidak saling menggeser baris.
+_append_lock = threading.Lock()
+_sequences_seeded = False
+
+def _seed_tag_sequences(records: list) -> None:
+    """Raise the allocator to the highest sequence already used in the register (once per process)"""
+    global _sequences_seeded
+    if _sequences_seeded:
+        return
+    floors = defaultdict(int)
+    for record in records:
+        sequence = str(record.get("Asset Tag", "")).strip().rsplit(".", 1)[-1]
+        if sequence.isdigit() and record.get("Code Company") and record.get("Code Type"):
+            key = tag_key(record["Code Company"], record["Code Type"], record.get("Tahun", ""))
+            floors[key] = max(floors[key], int(sequence))
+    tag_sequences.raise_floors(floors)
+    _sequences_seeded = True
+
+def _prepare_new_asset_row(data: dict):
+    """(row to append, prepared state) with ID, derived columns and Asset Tag already filled"""
+    headers = get_asset_headers()
+    if not headers:
+        raise ConnectionError("Assets headers unavailable")
+    records = get_assets("All")
+    _seed_tag_sequences(records)
+
+    row = asset_row_values(data)
+    row = row + [""] * (len(headers) - len(row))
+    # Sama dengan hitungan sync atas baris ini (termasuk tahun dari teks =DATE())
+    computed = compute_asset_columns(headers, [row], get_sync_references(),
+                                     first_id=_next_asset_id(records), allocate=tag_sequences.allocate_many)[0]
+    prepared = {
+        "row_number": len(records) + 2,
+        "record": _rows_to_records(headers, [computed])[0],
+    }
+    return computed, prepared
+
+def _next_asset_id(records: list) -> int:
+    """One above the highest numeric ID: after a delete the row count is lower than the last ID"""
+    ids = (asset_store.asset_id_key(record.get("ID", "")) for record in records)
+    return max((int(key) for key in ids if key.isdigit()), default=0) + 1
+
+def _appended_row_number(response):
+    """Row number from an append response ('Assets!A124:AA124' -> 124)"""
+    updated_range = ((response or {}).get("updates") or {}).get("updatedRange", "")
+    match = re.search(r"![A-Z]+(\d+)", updated_range)
+    return int(match.group(1)) if match else None
+
+def _record_appended_asset(prepared: dict) -> None:
+    """Apply a verified append to the mirror, row index and cached register"""
+    record, row_number = prepared["record"], prepared["row_number"]
+    asset_store.append_row(row_number, record)
+    with _asset_index_lock:
+        # ID dan Asset Tag baru unik (nomor dari allocator)
+        if _asset_index["ids"] is not None:
+            _asset_index["ids"][asset_store.asset_id_key(record.get("ID", ""))] = row_number
+        tag = str(record.get("Asset Tag", "")).strip()
+        if _asset_index["tags"] is not None and tag:
+            _asset_index["tags"][tag] = row_number
+    _drop_cached_assets()
 
+# ========================
+# Sync Data Aset
+# ========================
 @retry_on_api_error(max_retries=2)
 def sync_assets_data():
+    # Sync adalah pekerjaan massal: request interaktif didahulukan
+    with quota.background_priority():
+        return _sync_assets_data()
+
+def _sync_assets_data():
     try:
-        ref_data = get_cached_data("sync_references", _load_sync_references)
+        ref_data = get_sync_references()
         assets_ws = get_worksheet("Assets")
         if not assets_ws: 
             return {"success": False, "message": "Assets worksheet not found"}
 
-        headers = assets_ws.row_values(1)
-        data = assets_ws.get_all_values()[1:]
-        if not data:
-            return {"success": True, "message": "No data to sync", "updated": 0}
-
-        updated_data = []
-        tracker = defaultdict(int)
-        current_year = datetime.now().year
-        header_map = {h: i for i, h in enumerate(headers)}
-
-        for i, row in enumerate(data):
-            row_dict = dict(zip(headers, row))
-            updated_row = list(row)
+        values = assets_ws.get_all_values()
+        if len(values) < 2:
+            return {"success": True, "message": "No data to sync", "updated": 0, "changed_cells": 0}
+        headers, data = values[0], values[1:]
 
-            if "ID" in header_map:
-                updated_row[header_map["ID"]] = str(i + 1).zfill(3)
-
-            purchase_date = row_dict.get("Purchase Date", "")
-            try:
-                # Handle different date formats
-                if purchase_date:
-                    # Remove any apostrophe prefix
-                    clean_date = purchase_date.lstrip("'")
-                    # Try different date formats
-                    if "-" in clean_date:
-                        year = datetime.strptime(clean_date, "%Y-%m-%d").year
-                    elif "/" in clean_date:
-                        year = datetime.strptime(clean_date, "%m/%d/%Y").year
-                    else:
-                        year = int(clean_date[:4]) if len(clean_date) >= 4 else current_year
-                else:
-                    year = current_year
-            except:
-                year = current_year
-
-            if "Tahun" in header_map:
-                updated_row[header_map["Tahun"]] = str(year)
-
-            category = row_dict.get("Category", "")
-            cat_ref = ref_data["categories"].get(category, {})
-
-            residual_percent = to_decimal(cat_ref.get("Residual Percent", "0"))
-            if "Residual Percent" in header_map:
-                updated_row[header_map["Residual Percent"]] = str(residual_percent)
-
-            useful_life = to_int(cat_ref.get("Useful Life", "1"))
-            if "Useful Life" in header_map:
-                updated_row[header_map["Useful Life"]] = str(useful_life)
-
-            purchase_cost = to_decimal(row_dict.get("Purchase Cost", "0"))
-            residual_value = (purchase_cost * residual_percent / 100).quantize(Decimal("0.01"))
-            if "Residual Value" in header_map:
-                updated_row[header_map["Residual Value"]] = str(residual_value)
-
-            depreciation_value = ((purchase_cost - residual_value) / useful_life).quantize(Decimal("0.01")) if useful_life > 0 else Decimal(0)
-            if "Depreciation Value" in header_map:
-                updated_row[header_map["Depreciation Value"]] = str(depreciation_value)
-
-            age = max(0, current_year - year)
-            book_value = (purchase_cost - (depreciation_value * age)).quantize(Decimal("0.01"))
-            if "Book Value" in header_map:
-                updated_row[header_map["Book Value"]] = str(book_value)
-
-            code_category = cat_ref.get("Code Category", "")
-            if "Code Category" in header_map:
-                updated_row[header_map["Code Category"]] = str(code_category).zfill(2) if code_category else ""
-
-            company = row_dict.get("Company", "")
-            code_company = ref_data["companies"].get(company, "")
-            if "Code Company" in header_map:
-                updated_row[header_map["Code Company"]] = code_company
-
-            type_name = row_dict.get("Type", "")
-            code_type = ref_data["types"].get((type_name, category), "")
-            if "Code Type" in header_map:
-                updated_row[header_map["Code Type"]] = str(code_type).zfill(2) if code_type else ""
-
-            owner = row_dict.get("Owner", "")
-            code_owner = ref_data["owners"].get(owner, "")
-            if "Code Owner" in header_map:
-                updated_row[header_map["Code Owner"]] = code_owner
-
-            if code_company and code_category and code_type and code_owner:
-                key = (code_company, code_type, str(year))
-                tracker[key] += 1
-                seq_num = str(tracker[key]).zfill(3)
-                year_2digit = str(year)[-2:]
-                asset_tag = f"{code_company}-{str(code_category).zfill(2)}{str(code_type).zfill(2)}.{code_owner}{year_2digit}.{seq_num}"
-                if "Asset Tag" in header_map:
-                    updated_row[header_map["Asset Tag"]] = asset_tag
-
-            updated_data.append(updated_row)
+        # Asset Tag hanya divalidasi: tag yang sah dipertahankan, baris tanpa
+        # tag (atau dengan kode yang berubah) mendapat nomor dari allocator
+        last_sequences = {}
+        updated_data = compute_asset_columns(headers, data, ref_data, tracker=last_sequences,
+                                             allocate=tag_sequences.allocate_many)
+        tag_sequences.raise_floors(last_sequences)
 
         if updated_data:
-            assets_ws.update([headers] + updated_data)
-            return {"success": True, "message": f"Successfully synced {len(updated_data)} assets", "updated": len(updated_data)}
-
-        return {"success": True, "message": "No data to update", "updated": 0}
+            changes, changed_cells = _diff_ranges(data, updated_data)
+            token = sheet_version.begin_write() if changes else None
+            if changes:
+                assets_ws.batch_update(changes)
+            _store_assets(headers, _rows_to_records(headers, updated_data))
+            sheet_version.end_write(token)
+            return {
+                "success": True,
+                "message": f"Successfully synced {len(updated_data)} assets ({changed_cells} cells changed)",
+                "updated": len(updated_data),
+                "changed_cells": changed_cells,
+            }
+
+        return {"success": True, "message": "No data to update", "updated": 0, "changed_cells": 0}
 
     except Exception as e:
         logging.error(f"Sync error: {e}")
-        return {"success": False, "message": f"Sync failed: {str(e)}", "updated": 0}
-
-@retry_on_api_error()
-def _load_sync_references() -> dict:
-    ref_data = {"categories": {}, "types": {}, "companies": {}, "owners": {}}
-    try:
-        ws = get_worksheet("Ref_Categories")
-        if ws:
-            for row in ws.get_all_records():
-                ref_data["categories"][row["Category"]] = {
-                    "Code Category": row["Code Category"],
-                    "Residual Percent": row["Residual Percent"],
-                    "Useful Life": row["Useful Life"]
-                }
-
-        ws = get_worksheet("Ref_Types")
-        if ws:
-            for row in ws.get_all_records():
-                ref_data["types"][(row["Type"], row["Category"])] = row["Code Type"]
-
-        ws = get_worksheet("Ref_Companies")
-        if ws:
-            for row in ws.get_all_records():
-                ref_data["companies"][row["Company"]] = row["Code Company"]
-
-        ws = get_worksheet("Ref_Owners")
-        if ws:
-            for row in ws.get_all_records():
-                ref_data["owners"][row["Owner"]] = row["Code Owner"]
-
-        return ref_data
-    except Exception as e:
-        logging.warning(f"Failed to load sync references: {e}")
-        return ref_data
+        return {"success": False, "message": f"Sync failed: {str(e)}", "updated": 0, "changed_cells": 0}
+
+def _diff_ranges(original: list, updated: list, first_row: int = 2):
+    """Build batch_update payload covering only cells whose value changed.
+
+    Adjacent changed cells in the same row are merged into one range.
+    Returns (ranges, changed_cell_count).
+    """
+    ranges, changed_cells = [], 0
+    for offset, (old_row, new_row) in enumerate(zip(original, updated)):
+        row_number = first_row + offset
+        col = 0
+        while col < len(new_row):
+            old_value = old_row[col] if col < len(old_row) else ""
+            if str(new_row[col]) == old_value:
+                col += 1
+                continue
+            start = col
+            while col < len(new_row) and str(new_row[col]) != (old_row[col] if col < len(old_row) else ""):
+                col += 1
+            changed_cells += col - start
+            start_a1 = gspread.utils.rowcol_to_a1(row_number, start + 1)
+            end_a1 = gspread.utils.rowcol_to_a1(row_number, col)
+            ranges.append({"range": f"{start_a1}:{end_a1}", "values": [new_row[start:col]]})
+    return ranges, changed_cells
@@ -0,0 +1,67 @@
+# app/utils/tag_sequences.py
+import logging
+from typing import Dict, List
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.database.database import SessionLocal
+from app.utils.models import AssetTagSequence
+
+# ========================
+# Nomor Urut Asset Tag (PostgreSQL)
+# ========================
+# Satu baris per (code company, code type, tahun). Nomor diambil dengan satu
+# INSERT .. ON CONFLICT DO UPDATE .. RETURNING per kunci, sekaligus untuk
+# semua baris yang butuh nomor (sync / import massal): PostgreSQL mengunci
+# baris kunci tersebut, jadi submit paralel (thread maupun worker lain) tidak
+# bisa mendapat nomor yang sama. Nomor yang sudah keluar tidak dipakai ulang,
+# termasuk setelah baris aset dihapus. ID aset memakai kunci ID_SEQUENCE_KEY
+# (asset_compute) di tabel yang sama.
+_table = AssetTagSequence.__table__
+
+def allocate_many(key: tuple, count: int, floor: int = 0) -> List[int]:
+    """`count` consecutive sequence numbers for key (code company, code type, year), all above floor"""
+    if count <= 0:
+        return []
+    code_company, code_type, year = key
+    statement = insert(_table).values(
+        code_company=code_company, code_type=code_type, year=year, last_value=floor + count,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[_table.c.code_company, _table.c.code_type, _table.c.year],
+        set_={"last_value": func.greatest(_table.c.last_value, floor) + count},
+    ).returning(_table.c.last_value)
+    db = SessionLocal()
+    try:
+        last_value = db.execute(statement).scalar_one()
+        db.commit()
+        return list(range(last_value - count + 1, last_value + 1))
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def raise_floors(floors: Dict[tuple, int]) -> None:
+    """Make sure no key hands out a number at or below the ones already in the sheet"""
+    if not floors:
+        return
+    statement = insert(_table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[_table.c.code_company, _table.c.code_type, _table.c.year],
+        set_={"last_value": func.greatest(_table.c.last_value, statement.excluded.last_value)},
+    )
+    db = SessionLocal()
+    try:
+        db.execute(statement, [
+            {"code_company": k[0], "code_type": k[1], "year": k[2], "last_value": v}
+            for k, v in floors.items()
+        ])
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logging.warning(f"Gagal menyimpan nomor urut Asset Tag: {e}")
+        raise
+    finally:
+        db.close()
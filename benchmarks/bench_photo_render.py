@@ -0,0 +1,78 @@
+# benchmarks/bench_photo_render.py
+"""Compare the draft-mode rendition pipeline with the previous full-decode resize.
+
+    python -m benchmarks.bench_photo_render [megapixels ...]
+
+Writes synthetic phone-sized JPEGs (EXIF orientation 6, like a portrait shot)
+to a temp dir and renders each one in a fresh process, so the reported peak
+RSS belongs to a single image. Prints time and peak memory per image.
+"""
+import io
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+from app.utils.image_render import RENDITIONS, render_renditions
+
+# Typical phone camera resolutions (4:3)
+SIZES = {8: (3264, 2448), 12: (4032, 3024), 16: (4624, 3468), 50: (8160, 6120)}
+
+
+def legacy_resize(path, max_size=RENDITIONS["detail"], quality=85):
+    """resize_and_convert_image before the rendition pipeline: full decode, one WebP"""
+    image = Image.open(path)
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGB")
+    image.thumbnail(max_size, Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, format="WEBP", quality=quality, optimize=True)
+    return {"detail": output.getvalue()}
+
+
+def make_jpeg(path, size):
+    noise = Image.effect_noise((size[0] // 8, size[1] // 8), 64).resize(size)
+    image = Image.merge("RGB", (noise, noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT), noise))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 CW
+    image.save(path, format="JPEG", quality=90, exif=exif.tobytes())
+
+
+def _measure(fn_name, path, results):
+    fn = {"legacy": legacy_resize, "renditions": render_renditions}[fn_name]
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    output = fn(path)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((elapsed, max(0, peak - before) / 1024, {k: len(v) for k, v in output.items()}))
+
+
+def measure(fn_name, path):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_measure, args=(fn_name, path, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main(megapixels):
+    with tempfile.TemporaryDirectory() as tmp:
+        for mp in megapixels:
+            path = os.path.join(tmp, f"{mp}mp.jpg")
+            make_jpeg(path, SIZES[mp])
+            print(f"{mp:>3} MP {SIZES[mp][0]}x{SIZES[mp][1]}  ({os.path.getsize(path) // 1024} KB)")
+            for fn_name in ("legacy", "renditions"):
+                elapsed, peak_mb, sizes = measure(fn_name, path)
+                outputs = ", ".join(f"{name} {size // 1024} KB" for name, size in sizes.items())
+                print(f"    {fn_name:<11} {elapsed * 1000:8.1f} ms  peak +{peak_mb:6.1f} MB  [{outputs}]")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or sorted(SIZES))
@@ -0,0 +1,194 @@
+# tests/test_asset_append.py
+"""Incremental append after a delete: the new asset must not reuse an existing ID."""
+import os
+
+import pytest
+
+pytest.importorskip("gspread")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("requests")
+pytest.importorskip("httpx")
+pytest.importorskip("google.auth")
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.utils import asset_store, data_snapshot, sheet_version, sheets, tag_sequences
+
+# Urutan kolom mengikuti sheets.asset_row_values
+HEADERS = [
+    "ID", "Item Name", "Category", "Type", "Manufacture", "Model", "Serial Number",
+    "Asset Tag", "Company", "Bisnis Unit", "Location", "Room Location", "Notes",
+    "Condition", "Purchase Date", "Purchase Cost", "Warranty", "Supplier", "Journal",
+    "Owner", "Tahun", "Code Category", "Code Company", "Code Type", "Code Owner",
+    "Status", "Photo URL",
+]
+
+REF_DATA = {
+    "categories": {"IT": {"Code Category": "1", "Residual Percent": "10", "Useful Life": "4"}},
+    "types": {("Laptop", "IT"): "1"},
+    "companies": {"ACME": "AC"},
+    "owners": {"GA": "05"},
+}
+
+
+def _row(asset_id: int) -> list:
+    row = dict.fromkeys(HEADERS, "")
+    row.update({
+        "ID": str(asset_id).zfill(3), "Item Name": f"Laptop {asset_id}", "Category": "IT", "Type": "Laptop",
+        "Asset Tag": f"AC-0101.0524.{str(asset_id).zfill(3)}", "Company": "ACME", "Location": "HQ",
+        "Room Location": "R1", "Purchase Date": "2024-01-02", "Purchase Cost": "1000", "Owner": "GA",
+        "Tahun": "2024", "Code Category": "01", "Code Company": "AC", "Code Type": "01", "Code Owner": "05",
+        "Status": "Active",
+    })
+    return [row[h] for h in HEADERS]
+
+
+class FakeWorksheet:
+    def __init__(self, rows):
+        self.rows = [list(HEADERS)] + rows
+
+    def records(self):
+        return [dict(zip(HEADERS, row)) for row in self.rows[1:]]
+
+    def delete_rows(self, row_number):
+        del self.rows[row_number - 1]
+
+    def get_all_values(self):
+        return [[str(value) for value in row] for row in self.rows]
+
+    def batch_update(self, changes):
+        self.updates = changes
+
+    def append_row(self, row):
+        self.rows.append(list(row))
+        n = len(self.rows)
+        return {"updates": {"updatedRange": f"Assets!A{n}:AA{n}"}}
+
+
+@pytest.fixture
+def register(monkeypatch):
+    ws = FakeWorksheet([_row(i) for i in range(1, 6)])
+    mirror = []
+    sequences = {}
+
+    def allocate_many(key, count, floor=0):
+        start = max(sequences.get(key, 0), floor)
+        sequences[key] = start + count
+        return list(range(start + 1, start + count + 1))
+
+    def raise_floors(floors):
+        for key, value in floors.items():
+            sequences[key] = max(sequences.get(key, 0), value)
+
+    monkeypatch.setattr(sheets, "get_worksheet", lambda name: ws)
+    monkeypatch.setattr(sheets, "get_asset_headers", lambda: list(HEADERS))
+    monkeypatch.setattr(sheets, "get_assets", lambda status_filter="All": ws.records())
+    monkeypatch.setattr(sheets, "get_sync_references", lambda: REF_DATA)
+    monkeypatch.setattr(sheets, "_sequences_seeded", False)
+    monkeypatch.setattr(sheets, "sync_assets_data", lambda: pytest.fail("append fell back to a full sync"))
+    monkeypatch.setattr(tag_sequences, "allocate_many", allocate_many)
+    monkeypatch.setattr(tag_sequences, "raise_floors", raise_floors)
+    monkeypatch.setattr(sheet_version, "begin_write", lambda: None)
+    monkeypatch.setattr(asset_store, "delete_row", lambda row_number: mirror.append(("delete", row_number)))
+    monkeypatch.setattr(asset_store, "append_row", lambda row_number, record: mirror.append(("append", row_number, record)))
+    monkeypatch.setattr(asset_store, "replace_all", lambda records: mirror.append(("replace", records)))
+    monkeypatch.setattr(data_snapshot, "save", lambda name, data: None)
+    monkeypatch.setitem(sheets._asset_index, "headers", list(HEADERS))
+    monkeypatch.setitem(sheets._asset_index, "ids", {str(i): i + 1 for i in range(1, 6)})
+    monkeypatch.setitem(sheets._asset_index, "tags", {ws.rows[i][7]: i + 1 for i in range(1, 6)})
+    return ws, mirror
+
+
+def test_append_after_delete_uses_next_free_id(register):
+    ws, mirror = register
+
+    sheets.delete_asset_row(4)  # aset 003
+    sheets.append_asset({
+        "item_name": "New laptop", "category": "IT", "type": "Laptop", "company": "ACME",
+        "location": "HQ", "room_location": "R1", "purchase_date": "2024-06-01",
+        "purchase_cost": "1500", "owner": "GA",
+    })
+
+    ids = [row[0] for row in ws.rows[1:]]
+    assert ids == ["001", "002", "004", "005", "006"]
+    assert len(set(ids)) == len(ids)
+
+    assert mirror[-1][0] == "append"
+    _, row_number, record = mirror[-1]
+    # Record mengikuti get_all_records: ID dinumerikkan
+    assert (row_number, asset_store.asset_id_key(record["ID"])) == (6, "6")
+
+    # Lookup ID lama tetap ke aset lama, ID baru ke baris baru
+    assert sheets.find_asset_row("005") == 5
+    assert sheets.find_asset_row("006") == 6
+    assert sheets.find_asset_row("003") is None
+    assert record["Asset Tag"] == "AC-0101.0524.006"
+    assert sheets.find_asset_row(record["Asset Tag"]) == 6
+
+
+def test_append_without_delete_continues_ids(register):
+    ws, mirror = register
+
+    sheets.append_asset({
+        "item_name": "New laptop", "category": "IT", "type": "Laptop", "company": "ACME",
+        "location": "HQ", "room_location": "R1", "purchase_date": "2024-06-01",
+        "purchase_cost": "1500", "owner": "GA",
+    })
+
+    assert ws.rows[-1][0] == "006"
+    assert mirror[-1][1] == 7
+
+
+def test_sync_after_append_changes_nothing(register):
+    ws, mirror = register
+
+    sheets.append_asset({
+        "item_name": "New laptop", "category": "IT", "type": "Laptop", "company": "ACME",
+        "location": "HQ", "room_location": "R1", "purchase_date": "2023-06-01",
+        "purchase_cost": "1500", "owner": "GA",
+    })
+    appended = list(ws.rows[-1])
+    # Purchase Date ditulis sebagai teks =DATE(...) (append RAW)
+    assert appended[HEADERS.index("Purchase Date")].startswith("=DATE(")
+    assert appended[HEADERS.index("Tahun")] == "2023"
+
+    result = sheets._sync_assets_data()
+
+    assert result["success"], result
+    assert result["changed_cells"] == 0
+    assert ws.rows[-1] == appended
+    _, records = mirror[-1]
+    assert records[-1]["Asset Tag"] == mirror[-2][2]["Asset Tag"] == "AC-0101.0523.001"
+
+
+def test_sync_after_delete_keeps_ids(register):
+    ws, mirror = register
+
+    sheets.delete_asset_row(4)  # aset 003
+    result = sheets._sync_assets_data()
+
+    assert result["changed_cells"] == 0
+    assert [row[0] for row in ws.rows[1:]] == ["001", "002", "004", "005"]
+
+
+def test_unexpected_append_row_falls_back_without_renumbering(register, monkeypatch):
+    ws, mirror = register
+    append_row = ws.append_row
+
+    def append_after_outside_edit(row):
+        # Baris lain masuk langsung di sheet tepat sebelum append aplikasi
+        ws.rows.append(_row(9)[:1] + [""] * (len(HEADERS) - 1))
+        return append_row(row)
+
+    monkeypatch.setattr(ws, "append_row", append_after_outside_edit)
+    syncs = []
+    monkeypatch.setattr(sheets, "sync_assets_data", lambda: syncs.append(sheets._sync_assets_data()) or syncs[-1])
+
+    sheets.append_asset({
+        "item_name": "New laptop", "category": "IT", "type": "Laptop", "company": "ACME",
+        "location": "HQ", "room_location": "R1", "purchase_date": "2024-06-01",
+        "purchase_cost": "1500", "owner": "GA",
+    })
+
+    assert len(syncs) == 1 and syncs[0]["success"]
+    assert [row[0] for row in ws.rows[1:]] == ["001", "002", "003", "004", "005", "009", "006"]
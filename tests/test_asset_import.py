@@ -0,0 +1,100 @@
+# tests/test_asset_import.py
+"""Imported rows get their derived columns from the purchase date in the file."""
+import io
+import os
+from datetime import datetime
+
+import pytest
+
+gspread = pytest.importorskip("gspread")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pydantic")
+pytest.importorskip("google.auth")
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.utils import asset_import, asset_store, data_snapshot, sheet_version, sheets, tag_sequences
+
+# Urutan kolom mengikuti sheets.asset_row_values, lalu kolom depresiasi
+HEADERS = [
+    "ID", "Item Name", "Category", "Type", "Manufacture", "Model", "Serial Number",
+    "Asset Tag", "Company", "Bisnis Unit", "Location", "Room Location", "Notes",
+    "Condition", "Purchase Date", "Purchase Cost", "Warranty", "Supplier", "Journal",
+    "Owner", "Tahun", "Code Category", "Code Company", "Code Type", "Code Owner",
+    "Status", "Photo URL", "Residual Percent", "Useful Life", "Residual Value",
+    "Depreciation Value", "Book Value",
+]
+
+REF_DATA = {
+    "categories": {"IT": {"Code Category": "1", "Residual Percent": "10", "Useful Life": "4"}},
+    "types": {("Laptop", "IT"): "1"},
+    "companies": {"ACME": "AC"},
+    "owners": {"GA": "05"},
+}
+
+CSV = (
+    "Item Name,Category,Type,Company,Location,Room Location,Purchase Date,Purchase Cost,Owner,Status\n"
+    "Laptop,IT,Laptop,ACME,HQ,R1,2023-03-15,1000,GA,in storage\n"
+)
+
+
+class FakeWorksheet:
+    id = 1
+
+    def __init__(self):
+        self.rows = [list(HEADERS)]
+
+    def append_rows(self, rows):
+        self.rows.extend(list(row) for row in rows)
+
+    def get_all_values(self):
+        # Seperti gspread: setiap baris diisi sampai selebar header
+        width = len(HEADERS)
+        return [[str(value) for value in row] + [""] * (width - len(row)) for row in self.rows]
+
+    def batch_update(self, changes):
+        for change in changes:
+            row, col = gspread.utils.a1_to_rowcol(change["range"].split(":")[0])
+            cells = self.rows[row - 1]
+            cells.extend([""] * (len(HEADERS) - len(cells)))
+            for offset, value in enumerate(change["values"][0]):
+                cells[col - 1 + offset] = value
+
+
+@pytest.fixture
+def worksheet(monkeypatch):
+    ws = FakeWorksheet()
+    sequences = {}
+
+    def allocate_many(key, count, floor=0):
+        start = max(sequences.get(key, 0), floor)
+        sequences[key] = start + count
+        return list(range(start + 1, start + count + 1))
+
+    monkeypatch.setattr(sheets, "get_worksheet", lambda name: ws)
+    monkeypatch.setattr(sheets, "get_sync_references", lambda: REF_DATA)
+    monkeypatch.setattr(tag_sequences, "allocate_many", allocate_many)
+    monkeypatch.setattr(tag_sequences, "raise_floors", lambda floors: None)
+    monkeypatch.setattr(sheet_version, "begin_write", lambda: None)
+    monkeypatch.setattr(asset_store, "replace_all", lambda records: None)
+    monkeypatch.setattr(data_snapshot, "save", lambda name, data: None)
+    for name in ("add_type_if_not_exists", "add_location_if_not_exists",
+                 "add_company_with_code_if_not_exists", "add_owner_if_not_exists"):
+        monkeypatch.setattr(asset_import, name, lambda *args: None)
+    monkeypatch.setattr(asset_import, "validate_category_or_default", lambda category: category)
+    return ws
+
+
+def test_imported_row_uses_its_purchase_year(worksheet):
+    report = asset_import.import_assets("assets.csv", io.BytesIO(CSV.encode("utf-8")))
+
+    assert report["imported"] == 1, report
+    row = dict(zip(HEADERS, worksheet.rows[1]))
+    age = datetime.now().year - 2023
+    assert row["Status"] == "In Storage"
+    assert row["ID"] == "001"
+    assert row["Tahun"] == "2023"
+    assert row["Asset Tag"] == "AC-0101.0523.001"
+    assert row["Residual Value"] == "100.00"
+    assert row["Depreciation Value"] == "225.00"
+    assert row["Book Value"] == f"{1000 - 225 * age:.2f}"
@@ -0,0 +1,113 @@
+# tests/test_cache.py
+import os
+import threading
+import time
+
+import pytest
+
+from app.utils import cache
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+
+def setup_function():
+    cache.clear_cache()
+
+
+def test_concurrent_misses_run_builder_once():
+    calls = []
+    start = threading.Barrier(50)
+    results = []
+
+    def builder():
+        calls.append(1)
+        time.sleep(0.2)  # tahan builder agar semua thread datang saat load berjalan
+        return {"rows": 42}
+
+    def worker():
+        start.wait()
+        results.append(cache.get_cached_data("test:single-flight", builder, timeout=60))
+
+    threads = [threading.Thread(target=worker) for _ in range(50)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 50
+    assert all(r == {"rows": 42} for r in results)
+
+
+def test_cold_miss_counted_once():
+    before = cache.get_cache_stats()
+    cache.get_cached_data("test:stats", lambda: "value", timeout=60)
+    cache.get_cached_data("test:stats", lambda: "value", timeout=60)
+    after = cache.get_cache_stats()
+
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+
+def test_peek_does_not_touch_stats():
+    cache.get_cached_data("test:peek", lambda: "value", timeout=60)
+    before = cache.get_cache_stats()
+
+    assert cache.peek_cached_data("test:peek") == "value"
+    assert cache.peek_cached_data("test:missing") is None
+
+    after = cache.get_cache_stats()
+    assert (after["hits"], after["misses"]) == (before["hits"], before["misses"])
+
+
+def test_cached_decorator_counts_one_miss():
+    calls = []
+
+    @cache.cached(ttl=60)
+    def load(x):
+        calls.append(x)
+        return x * 2
+
+    before = cache.get_cache_stats()
+    assert load(3) == 6
+    assert load(3) == 6
+    after = cache.get_cache_stats()
+
+    assert calls == [3]
+    assert after["misses"] - before["misses"] == 1
+
+
+@pytest.mark.parametrize("version", [None, "v1"])
+def test_concurrent_get_assets_loads_sheet_once(monkeypatch, version):
+    for module in ("gspread", "sqlalchemy", "google.auth"):
+        pytest.importorskip(module)
+    from app.utils import asset_store, sheet_version, sheets
+
+    calls = []
+    start = threading.Barrier(50)
+    results = []
+
+    def load_assets_from_sheet():
+        calls.append(1)
+        time.sleep(0.2)  # semua thread datang saat load berjalan
+        return [{"ID": "001", "Status": "Active"}, {"ID": "002", "Status": "Disposed"}]
+
+    # Tanpa versi: jalur mirror-belum-siap; dengan versi: jalur cache register per versi
+    monkeypatch.setattr(sheet_version, "current", lambda: version)
+    monkeypatch.setattr(sheets, "_warming_up", threading.Event())
+    monkeypatch.setattr(asset_store, "load", lambda status_filter="All": None)
+    monkeypatch.setattr(sheets, "_assets_from_saved_snapshot", lambda: None)
+    monkeypatch.setattr(sheets, "_load_assets_from_sheet", load_assets_from_sheet)
+
+    def worker():
+        start.wait()
+        results.append(sheets.get_assets("Active"))
+
+    threads = [threading.Thread(target=worker) for _ in range(50)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [[{"ID": "001", "Status": "Active"}]] * 50
@@ -0,0 +1,77 @@
+# tests/test_photo_jobs.py
+"""Photo uploads are stored and read back in fixed-size chunks, never as one buffer."""
+import io
+import os
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("PIL")
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import func, select
+
+from app.database.database import Base, engine
+from app.utils import photo_jobs
+from app.utils.models import PhotoJob, PhotoJobChunk
+
+
+class ChunkReader(io.BytesIO):
+    """Upload stand-in that records every read size"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super().read(size)
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    tables = [PhotoJob.__table__, PhotoJobChunk.__table__]
+    Base.metadata.create_all(engine, tables=tables)
+    queue = photo_jobs.PhotoJobQueue(workers=0)
+    monkeypatch.setattr(queue, "start", lambda: None)
+    yield queue
+    Base.metadata.drop_all(engine, tables=tables)
+
+
+def _count(queue, model) -> int:
+    return queue._select(select(func.count().label("n")).select_from(model))[0]["n"]
+
+
+def test_upload_is_stored_in_chunks(jobs):
+    data = os.urandom(2 * photo_jobs.SPOOL_CHUNK_SIZE + 100)
+    source = ChunkReader(data)
+
+    job = jobs.submit("007", "photo.jpg", source)
+
+    assert set(source.reads) == {photo_jobs.SPOOL_CHUNK_SIZE}
+    assert _count(jobs, PhotoJobChunk) == 3
+    copy = io.BytesIO()
+    assert jobs._copy_chunks(job["id"], copy) == 3
+    assert copy.getvalue() == data
+    assert [j["id"] for j in jobs.pending_for("007")] == [job["id"]]
+
+
+def test_oversized_upload_stores_nothing(jobs, monkeypatch):
+    monkeypatch.setattr(photo_jobs, "MAX_PHOTO_BYTES", photo_jobs.SPOOL_CHUNK_SIZE)
+
+    with pytest.raises(ValueError):
+        jobs.submit("007", "photo.jpg", io.BytesIO(b"x" * (photo_jobs.SPOOL_CHUNK_SIZE + 1)))
+
+    assert _count(jobs, PhotoJobChunk) == 0
+    assert _count(jobs, PhotoJob) == 0
+
+
+def test_finished_job_drops_its_chunks(jobs, monkeypatch):
+    job = jobs.submit("007", "photo.jpg", io.BytesIO(b"raw image"))
+    monkeypatch.setattr(jobs, "_handle", lambda job: None)
+
+    jobs._process(job["id"])
+
+    assert jobs.get(job["id"])["status"] == photo_jobs.DONE
+    assert _count(jobs, PhotoJobChunk) == 0